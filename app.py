@@ -5,26 +5,43 @@ using pattern matching. Runs completely offline with no API costs.
 """
 
 import streamlit as st
-import pandas as pd
 import os
 import json
-from datetime import datetime
-from data_manager import DataManager
-from query_engine_free import QueryEngine
+import shutil
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
+# DataManager/QueryEngine (and pandas with them) are imported lazily inside
+# the functions that need them, so the first page render is not blocked on them.
 
-def load_config():
-    """Load configuration from config.json"""
-    config_path = os.path.join(os.path.dirname(__file__), "config.json")
+# Resolved once; relative paths in config.json are relative to the app folder
+APP_DIR = Path(__file__).parent
+CONFIG_PATH = str(APP_DIR / "config.json")
+
+# Prefer orjson (C-accelerated) for config.json, fall back to stdlib json
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = lambda obj: orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = lambda obj: json.dumps(obj, indent=2).encode()
+
+
+@st.cache_resource(show_spinner=False)
+def _read_config(config_path: str, mtime_ns: int) -> dict:
+    """Parse config.json once per file version (keyed by mtime)."""
     default_config = {
         "data_file": "./data/water_data.xlsx",
         "export_folder": "./data"
     }
     
-    if os.path.exists(config_path):
+    if mtime_ns:
         try:
-            with open(config_path, 'r') as f:
-                config = json.load(f)
+            with open(config_path, 'rb', buffering=65536) as f:
+                config = _json_loads(f.read())
                 # Merge with defaults
                 return {**default_config, **config}
         except Exception as e:
@@ -33,18 +50,18 @@ def load_config():
     return default_config
 
 
-# Load config
-config = load_config()
+def load_config():
+    """Load configuration from config.json (re-parsed only when the file changes)"""
+    try:
+        mtime_ns = os.stat(CONFIG_PATH).st_mtime_ns
+    except OSError:
+        mtime_ns = 0
+    # Copy: the cached dict is shared by every session, and callers update theirs
+    return dict(_read_config(CONFIG_PATH, mtime_ns))
 
-# Page config
-st.set_page_config(
-    page_title="Water Quality Chatbot",
-    page_icon="💧",
-    layout="wide"
-)
 
-# Custom CSS
-st.markdown("""
+# Static page content (built once as module constants, not per widget)
+CUSTOM_CSS = """
 <style>
     .stChatMessage {
         padding: 1rem;
@@ -54,7 +71,44 @@ st.markdown("""
         margin: 0.2rem;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+SIDEBAR_HELP_MD = """
+---
+### 💡 Example Questions
+- Coldest January water temp 1981-1995
+- Average dissolved oxygen by year
+- Show data for site 2
+- Compare summer vs winter temperature
+- How many samples per site?
+- Correlation between temp and oxygen
+- Trend of pH over time
+- Summary statistics for turbidity
+
+---
+### ℹ️ About
+This chatbot uses **pattern matching** to understand your questions - no AI/API required!
+
+It recognizes:
+- Parameter names (temperature, pH, ecoli, etc.)
+- Time periods (months, years, seasons)
+- Aggregations (average, maximum, minimum)
+- Comparisons and trends
+"""
+
+
+# Load config
+config = load_config()
+
+# Page config
+st.set_page_config(
+    page_title="Water Quality Chatbot",
+    page_icon="💧",
+    layout="wide"
+)
+
+# Custom CSS
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 # Initialize session state
 if "messages" not in st.session_state:
@@ -70,23 +124,103 @@ if "auto_loaded" not in st.session_state:
     st.session_state.auto_loaded = False
 
 
+# Each entry holds a full DataFrame plus its caches; every upload or edit of the
+# data file adds a key, so only the most recent few versions are kept
+@st.cache_resource(show_spinner=False, max_entries=3)
+def get_data_manager(abs_path: str, mtime_ns: int):
+    """Build a DataManager and QueryEngine once per file version, shared across sessions."""
+    from data_manager import DataManager
+    from query_engine_free import QueryEngine
+    
+    dm = DataManager(abs_path)
+    dm.get_data()  # the app always needs the rows, not just metadata
+    dm.sites_registry = []
+    dm.query_examples = []
+    dm.column_metadata = []
+    dm.initialize_chroma()
+    return dm, QueryEngine(dm)
+
+
+def resolve_data_path(path: str):
+    """
+    Resolve a data path (relative paths are relative to the app folder) with one stat.
+    
+    Returns:
+        Tuple of (absolute path, mtime_ns), with mtime_ns None if the file is missing
+    """
+    abs_path = os.path.abspath(path if os.path.isabs(path) else APP_DIR / path)
+    try:
+        return abs_path, os.stat(abs_path).st_mtime_ns
+    except OSError:
+        return abs_path, None
+
+
+def clear_result_snapshots():
+    """Delete this session's full-result snapshots (chat history keeps its previews)."""
+    snapshot_dir = st.session_state.pop("snapshot_dir", None)
+    if snapshot_dir:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+
+def activate_data_file(abs_path: str, mtime_ns: int):
+    """Load a data file (cached) and make it this session's data manager and query engine."""
+    dm, qe = get_data_manager(abs_path, mtime_ns)
+    if dm is not st.session_state.data_manager:
+        # Snapshots of results from the previous data are stale now
+        clear_result_snapshots()
+    st.session_state.data_manager, st.session_state.query_engine = dm, qe
+    return dm
+
+
+@st.cache_resource(show_spinner=False)
+def netcdf_export_available():
+    """Probe for NetCDF export support once per process (None if the module is missing)."""
+    try:
+        from netcdf_exporter import check_netcdf_available
+    except ImportError:
+        return None
+    return check_netcdf_available()
+
+
+@st.cache_resource(show_spinner=False)
+def get_export_executor() -> ThreadPoolExecutor:
+    """Single background worker shared by all sessions for NetCDF exports."""
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="netcdf-export")
+
+
+def run_netcdf_export(dm, output_path: str, title: str, institution: str):
+    """Export dm to NetCDF (runs on the export worker thread)."""
+    from netcdf_exporter import NetCDFExporter
+    
+    exporter = NetCDFExporter(dm)
+    output_path = exporter.export(
+        output_path=output_path,
+        title=title,
+        institution=institution
+    )
+    return output_path, exporter.get_export_summary()
+
+
+@st.cache_data(show_spinner=False)
+def get_data_overview(_dm, file_path: str, last_modified: float) -> dict:
+    """Data summary plus formatted date range, computed once per loaded file version."""
+    summary = _dm.get_data_summary()
+    if 'sample_date' in _dm.df.columns:
+        summary['first_date'] = _dm.df['sample_date'].min().strftime('%Y-%m-%d')
+        summary['last_date'] = _dm.df['sample_date'].max().strftime('%Y-%m-%d')
+    return summary
+
+
 def load_data_from_config():
     """Auto-load data from config.json on startup."""
     data_file = config.get("data_file", "")
+    if not data_file:
+        return False, "File not found"
     
-    # Resolve relative paths
-    if data_file and not os.path.isabs(data_file):
-        data_file = os.path.join(os.path.dirname(__file__), data_file)
-    
-    if data_file and os.path.exists(data_file):
+    abs_path, mtime_ns = resolve_data_path(data_file)
+    if mtime_ns is not None:
         try:
-            dm = DataManager(data_file)
-            dm.sites_registry = []
-            dm.query_examples = []
-            dm.column_metadata = []
-            dm.initialize_chroma()
-            st.session_state.data_manager = dm
-            st.session_state.query_engine = QueryEngine(dm)
+            dm = activate_data_file(abs_path, mtime_ns)
             return True, len(dm.df)
         except Exception as e:
             return False, str(e)
@@ -109,19 +243,8 @@ with st.sidebar:
     # File upload
     st.markdown("### 📂 Data Source")
     
-    # Get default file from config
-    default_file = config.get("data_file", "")
-    if default_file and not os.path.isabs(default_file):
-        default_file = os.path.join(os.path.dirname(__file__), default_file)
-    
-    # Show current status
-    if st.session_state.data_manager is not None:
-        st.success(f"✅ Data loaded: {len(st.session_state.data_manager.df)} samples")
-        st.caption(f"📁 `{config.get('data_file', 'N/A')}`")
-    elif config.get("data_file"):
-        st.warning(f"⚠️ File not found: {config.get('data_file')}")
-    else:
-        st.info("👆 Upload your Excel or NetCDF file to get started")
+    # Current status (filled in below, after any upload/reload in this run)
+    status_slot = st.empty()
     
     # File uploader
     uploaded_file = st.file_uploader(
@@ -131,32 +254,30 @@ with st.sidebar:
     )
     
     # Handle file upload - save to data folder and update config
-    if uploaded_file:
+    # (once per uploaded file; the widget keeps returning it on later reruns)
+    if uploaded_file and st.session_state.get("uploaded_file_id") != uploaded_file.file_id:
+        st.session_state.uploaded_file_id = uploaded_file.file_id
         os.makedirs("data", exist_ok=True)
         file_ext = os.path.splitext(uploaded_file.name)[1].lower()
         save_filename = f"water_data{file_ext}"
         save_path = os.path.join("data", save_filename)
         
-        with open(save_path, "wb") as f:
-            f.write(uploaded_file.getvalue())
+        # Copy in 1 MiB chunks rather than materializing the whole upload
+        uploaded_file.seek(0)
+        with open(save_path, "wb", buffering=1 << 20) as f:
+            shutil.copyfileobj(uploaded_file, f, length=1 << 20)
         
-        # Update config.json
+        # Update config.json (skip the rewrite if the path is unchanged)
+        prev_data_file = config.get("data_file")
         config["data_file"] = f"./data/{save_filename}"
-        config_path = os.path.join(os.path.dirname(__file__), "config.json")
-        with open(config_path, "w") as f:
-            json.dump(config, f, indent=2)
+        if config["data_file"] != prev_data_file:
+            with open(CONFIG_PATH, "wb", buffering=65536) as f:
+                f.write(_json_dumps(config))
         
         # Load the data
         try:
-            dm = DataManager(save_path)
-            dm.sites_registry = []
-            dm.query_examples = []
-            dm.column_metadata = []
-            dm.initialize_chroma()
-            st.session_state.data_manager = dm
-            st.session_state.query_engine = QueryEngine(dm)
-            st.success(f"✅ Loaded {len(dm.df)} samples")
-            st.rerun()
+            dm = activate_data_file(*resolve_data_path(os.path.abspath(save_path)))
+            st.toast(f"✅ Loaded {len(dm.df)} samples")
         except Exception as e:
             st.error(f"Error loading file: {e}")
     
@@ -165,101 +286,111 @@ with st.sidebar:
         if st.button("🔄 Reload Data", help="Reload if Excel file was updated"):
             try:
                 data_path = config.get("data_file", "")
-                if data_path and not os.path.isabs(data_path):
-                    data_path = os.path.join(os.path.dirname(__file__), data_path)
+                abs_path, mtime_ns = resolve_data_path(data_path) if data_path else ("", None)
                 
-                if data_path and os.path.exists(data_path):
-                    dm = DataManager(data_path)
-                    dm.sites_registry = []
-                    dm.query_examples = []
-                    dm.column_metadata = []
-                    dm.initialize_chroma()
-                    st.session_state.data_manager = dm
-                    st.session_state.query_engine = QueryEngine(dm)
+                if mtime_ns is not None:
+                    dm = activate_data_file(abs_path, mtime_ns)
                     st.success(f"✅ Reloaded {len(dm.df)} samples")
-                    st.rerun()
                 else:
                     st.error("Data file not found")
             except Exception as e:
                 st.error(f"Error loading data: {e}")
     
-    st.markdown("---")
-    
-    # Data overview
-    if st.session_state.data_manager is not None:
-        dm = st.session_state.data_manager
-        summary = dm.get_data_summary()
-        
-        st.markdown("### 📊 Data Overview")
-        st.metric("Total Samples", summary.get('total_samples', 0))
-        st.metric("Sites Monitored", summary.get('total_sites', 0))
-        st.metric("Parameters", summary.get('columns', 0))
-        
-        # Show date range
-        if 'sample_date' in dm.df.columns:
-            st.markdown(f"**Date Range:**")
-            st.markdown(f"{dm.df['sample_date'].min().strftime('%Y-%m-%d')} to {dm.df['sample_date'].max().strftime('%Y-%m-%d')}")
+    with status_slot.container():
+        if st.session_state.data_manager is not None:
+            st.success(f"✅ Data loaded: {len(st.session_state.data_manager.df)} samples")
+            st.caption(f"📁 `{config.get('data_file', 'N/A')}`")
+        elif config.get("data_file"):
+            st.warning(f"⚠️ File not found: {config.get('data_file')}")
+        else:
+            st.info("👆 Upload your Excel or NetCDF file to get started")
     
     st.markdown("---")
-    st.markdown("### 💡 Example Questions")
-    st.markdown("""
-    - Coldest January water temp 1981-1995
-    - Average dissolved oxygen by year
-    - Show data for site 2
-    - Compare summer vs winter temperature
-    - How many samples per site?
-    - Correlation between temp and oxygen
-    - Trend of pH over time
-    - Summary statistics for turbidity
-    """)
     
-    st.markdown("---")
-    st.markdown("### ℹ️ About")
-    st.markdown("""
-    This chatbot uses **pattern matching** to understand your questions - no AI/API required!
+    # Data overview (placeholder, filled in after the chat has rendered)
+    overview_slot = st.empty()
     
-    It recognizes:
-    - Parameter names (temperature, pH, ecoli, etc.)
-    - Time periods (months, years, seasons)
-    - Aggregations (average, maximum, minimum)
-    - Comparisons and trends
-    """)
+    # Static help text, emitted as a single element
+    st.markdown(SIDEBAR_HELP_MD)
     
     # NetCDF Export Section
-    st.markdown("---")
-    st.markdown("### 📦 Export to NetCDF")
+    st.markdown("---\n### 📦 Export to NetCDF")
     
     if st.session_state.data_manager is not None:
-        try:
-            from netcdf_exporter import NetCDFExporter, check_netcdf_available
+        nc_available = netcdf_export_available()
+        
+        if nc_available:
+            export_title = st.text_input("Dataset Title", value="Water Quality Monitoring Data")
+            export_institution = st.text_input("Institution", value="Bard College")
             
-            if check_netcdf_available():
-                export_title = st.text_input("Dataset Title", value="Water Quality Monitoring Data")
-                export_institution = st.text_input("Institution", value="Bard College")
-                
-                if st.button("📥 Export to NetCDF"):
+            export_future = st.session_state.get("export_future")
+            
+            if export_future is not None and not export_future.done():
+                st.info("⏳ Export in progress...")
+                st.button("🔄 Check export status")
+            else:
+                if export_future is not None:
+                    # Report the finished background export once
+                    st.session_state.export_future = None
                     try:
-                        exporter = NetCDFExporter(st.session_state.data_manager)
-                        output_path = os.path.join("data", "water_quality_data.nc")
-                        exporter.export(
-                            output_path=output_path,
-                            title=export_title,
-                            institution=export_institution
-                        )
+                        output_path, summary = export_future.result()
                         st.success(f"✅ Exported to {output_path}")
-                        
-                        # Show summary
-                        summary = exporter.get_export_summary()
                         st.markdown(f"**Exported:** {summary['num_samples']} samples, {summary['num_sites']} sites, {len(summary['variables'])} variables")
                     except Exception as e:
                         st.error(f"Export error: {e}")
-            else:
-                st.warning("NetCDF4 not installed. Run:\n`python3 -m pip install netCDF4`")
-        except ImportError:
+                
+                if st.button("📥 Export to NetCDF"):
+                    # Run in a worker thread so the app stays responsive
+                    st.session_state.export_future = get_export_executor().submit(
+                        run_netcdf_export,
+                        st.session_state.data_manager,
+                        os.path.join("data", "water_quality_data.nc"),
+                        export_title,
+                        export_institution
+                    )
+                    st.rerun()
+        elif nc_available is None:
             st.warning("NetCDF export module not found.")
+        else:
+            st.warning("NetCDF4 not installed. Run:\n`python3 -m pip install netCDF4`")
     else:
         st.info("Load data first to enable export")
 
+# Chat history keeps only this many rows of each result; larger results are
+# snapshotted to Parquet (in a per-session temp dir) and offered as a download
+HISTORY_PREVIEW_ROWS = 200
+
+
+def to_arrow_preview(preview_df):
+    """Serialize a preview frame to Arrow once, so history reruns skip the conversion."""
+    try:
+        import pyarrow as pa
+        
+        return pa.Table.from_pandas(preview_df)
+    except Exception:
+        # Column types Arrow can't represent: keep the DataFrame
+        return preview_df
+
+
+def to_history_data(result_df):
+    """Shrink a result frame for chat history, returning (Arrow preview, full_path)."""
+    if result_df is None:
+        return None, None
+    if len(result_df) <= HISTORY_PREVIEW_ROWS:
+        return to_arrow_preview(result_df), None
+    
+    # Snapshots live in a per-session temp dir, not next to the user's data
+    if "snapshot_dir" not in st.session_state:
+        st.session_state.snapshot_dir = tempfile.mkdtemp(prefix="waterchatbot_")
+    full_path = os.path.join(st.session_state.snapshot_dir, f"_msg_{uuid.uuid4().hex}.parquet")
+    try:
+        result_df.to_parquet(full_path)
+    except Exception as e:
+        print(f"Error saving full result: {e}")
+        full_path = None
+    return to_arrow_preview(result_df.head(HISTORY_PREVIEW_ROWS)), full_path
+
+
 # Main content
 st.title("💧 Water Quality Data Assistant")
 st.markdown("Ask questions about your water monitoring data in natural language. **Free & offline!**")
@@ -288,12 +419,23 @@ if st.session_state.query_engine is not None:
 
 st.markdown("---")
 
-# Chat interface
-for message in st.session_state.messages:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"])
-        if "data" in message and message["data"] is not None:
-            st.dataframe(message["data"], use_container_width=True)
+# Chat interface: history and the new exchange render into one container
+chat_area = st.container()
+with chat_area:
+    for message in st.session_state.messages:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+            if "data" in message and message["data"] is not None:
+                st.dataframe(message["data"], use_container_width=True)
+            if message.get("full_path") and os.path.exists(message["full_path"]):
+                st.caption(f"Showing first {HISTORY_PREVIEW_ROWS} rows")
+                with open(message["full_path"], "rb") as f:
+                    st.download_button(
+                        "⬇️ Download full result",
+                        data=f,
+                        file_name="result.parquet",
+                        key=message["full_path"]
+                    )
 
 # Chat input
 if prompt := st.chat_input("Ask a question about your water data..."):
@@ -301,34 +443,57 @@ if prompt := st.chat_input("Ask a question about your water data..."):
     if st.session_state.data_manager is None:
         st.warning("⚠️ Please load data first using the sidebar")
     else:
-        # Add user message
-        st.session_state.messages.append({"role": "user", "content": prompt})
-        with st.chat_message("user"):
-            st.markdown(prompt)
+        with chat_area:
+            # Add user message
+            st.session_state.messages.append({"role": "user", "content": prompt})
+            with st.chat_message("user"):
+                st.markdown(prompt)
+            
+            # Generate response
+            with st.chat_message("assistant"):
+                try:
+                    result = st.session_state.query_engine.query(prompt)
+                    response = result.explanation
+                    st.markdown(response)
+                    
+                    # The result table is only built here, once the explanation is shown
+                    result_df = result.df
+                    
+                    if result_df is not None and len(result_df) > 0:
+                        st.dataframe(result_df, use_container_width=True)
+                    
+                    # Save to history (preview only for large results)
+                    preview_df, full_path = to_history_data(result_df)
+                    st.session_state.messages.append({
+                        "role": "assistant",
+                        "content": response,
+                        "data": preview_df,
+                        "full_path": full_path
+                    })
+                except Exception as e:
+                    error_msg = f"Error processing query: {str(e)}"
+                    st.error(error_msg)
+                    st.session_state.messages.append({
+                        "role": "assistant",
+                        "content": error_msg,
+                        "data": None
+                    })
+
+# Data overview metrics in the sidebar placeholder
+if st.session_state.data_manager is not None:
+    dm = st.session_state.data_manager
+    summary = get_data_overview(dm, dm.file_path, dm.last_modified)
+    
+    with overview_slot.container():
+        st.markdown("### 📊 Data Overview")
+        st.metric("Total Samples", summary.get('total_samples', 0))
+        st.metric("Sites Monitored", summary.get('total_sites', 0))
+        st.metric("Parameters", summary.get('columns', 0))
         
-        # Generate response
-        with st.chat_message("assistant"):
-            try:
-                response, result_df = st.session_state.query_engine.query(prompt)
-                st.markdown(response)
-                
-                if result_df is not None and len(result_df) > 0:
-                    st.dataframe(result_df, use_container_width=True)
-                
-                # Save to history
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": response,
-                    "data": result_df
-                })
-            except Exception as e:
-                error_msg = f"Error processing query: {str(e)}"
-                st.error(error_msg)
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": error_msg,
-                    "data": None
-                })
+        # Show date range
+        if 'first_date' in summary:
+            st.markdown(f"**Date Range:**")
+            st.markdown(f"{summary['first_date']} to {summary['last_date']}")
 
 # Process any pending messages from button clicks
 if st.session_state.messages and st.session_state.query_engine:
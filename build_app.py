@@ -11,6 +11,9 @@ Output:
 import os
 import shutil
 
+# Copy with 1 MiB chunks instead of the 64 KiB default
+shutil.COPY_BUFSIZE = 1 << 20
+
 
 def create_distribution():
     """Create a clean distribution folder for sharing with team."""
@@ -21,9 +24,6 @@ def create_distribution():
     if os.path.exists(dist_folder):
         shutil.rmtree(dist_folder)
     
-    os.makedirs(dist_folder)
-    os.makedirs(os.path.join(dist_folder, "data"))
-    
     # Files to include
     files_to_copy = [
         "app.py",
@@ -35,10 +35,16 @@ def create_distribution():
         "run_app_windows.bat",
     ]
     
-    for f in files_to_copy:
-        if os.path.exists(f):
-            shutil.copy(f, dist_folder)
-            print(f"  ✅ Copied {f}")
+    def ignore_unlisted(directory, names):
+        """Skip everything in the project folder that is not listed above."""
+        return [n for n in names if n not in files_to_copy]
+    
+    def copy_and_report(src, dst):
+        shutil.copy2(src, dst)
+        print(f"  ✅ Copied {os.path.basename(src)}")
+    
+    shutil.copytree(".", dist_folder, ignore=ignore_unlisted, copy_function=copy_and_report)
+    os.makedirs(os.path.join(dist_folder, "data"))
     
     # Copy README_TEAM.md as README.md
     if os.path.exists("README_TEAM.md"):
@@ -6,6 +6,7 @@ Uses simple in-memory storage with JSON persistence.
 """
 
 import os
+import heapq
 import pandas as pd
 import numpy as np
 import json
@@ -13,22 +14,98 @@ from datetime import datetime
 from typing import Optional, List, Dict, Any
 from difflib import SequenceMatcher
 
+# Prefer RapidFuzz (C++) for fuzzy matching; fall back to difflib
+try:
+    from rapidfuzz import fuzz
+    HAS_RAPIDFUZZ = True
+except ImportError:
+    HAS_RAPIDFUZZ = False
+
+# Prefer orjson (C-accelerated) for metadata.json, fall back to stdlib json
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = lambda obj: orjson.dumps(obj, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = lambda obj: json.dumps(obj, default=str).encode()
+
+# Prefer the Rust-based calamine reader for Excel; fall back to openpyxl
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = None
+
 
 class DataManager:
     """Manages water quality data from Excel or NetCDF and site metadata."""
     
     SHEET_NAME = "FieldData"  # Only use this sheet for Excel
     
-    def __init__(self, file_path: str, metadata_path: str = "./metadata"):
+    # Column descriptions for water quality parameters (keys are lowercase)
+    COLUMN_DESCRIPTIONS = {
+        "sample_date": "Date when the water sample was collected",
+        "site": "Site identifier/number where sample was taken",
+        "year": "Year of sample collection",
+        "month": "Month of sample collection (1-12)",
+        "season": "Season (Winter, Spring, Summer, Fall)",
+        "time": "Time of day when sample was collected",
+        "air_temp.c": "Air temperature in degrees Celsius",
+        "water_temp.c": "Water temperature in degrees Celsius",
+        "dissolved_oxygen.percent": "Dissolved oxygen as percentage saturation",
+        "dissolved_oxygen.mg_per_l": "Dissolved oxygen in milligrams per liter",
+        "uncompensated_conductivity.us_per_cm": "Uncompensated electrical conductivity in microsiemens per cm",
+        "compensated_conductivity.us_per_cm": "Temperature-compensated conductivity in microsiemens per cm",
+        "ph": "pH level (acidity/alkalinity, scale 0-14)",
+        "turbidity.ntu": "Turbidity in Nephelometric Turbidity Units (water clarity)",
+        "phycocyanin.rfu_tot": "Phycocyanin total relative fluorescence units (cyanobacteria indicator)",
+        "cdom.rfu_tot": "Colored Dissolved Organic Matter total RFU",
+        "optical_brightness.rfu_tot": "Optical brightness total RFU",
+        "chlorophyll_a.rfu_tot": "Chlorophyll-a total RFU (algae indicator)",
+        "phycocyanin.rfu_0.22": "Phycocyanin RFU filtered at 0.22 microns",
+        "cdom.rfu_0.22": "CDOM RFU filtered at 0.22 microns",
+        "ob.rfu_0.22": "Optical brightness RFU filtered at 0.22 microns",
+        "chlorophyll_a.rfu_0.22": "Chlorophyll-a RFU filtered at 0.22 microns",
+        "entero.cfu_per_100ml": "Enterococcus colony forming units per 100mL (fecal indicator bacteria)",
+        "total_coliforms.cfu_per_100ml": "Total coliform bacteria CFU per 100mL",
+        "ecoli.cfu_per_100ml": "E. coli colony forming units per 100mL (fecal contamination indicator)",
+        "fecal_coliform.mft_per_100ml": "Fecal coliform by membrane filtration per 100mL",
+        "fecal_strep.mft_per_100ml": "Fecal streptococcus by membrane filtration per 100mL",
+        "fc_to_fs.ratio": "Fecal coliform to fecal strep ratio (human vs animal source indicator)",
+        "total_coliform.mft_per_100ml": "Total coliform by membrane filtration per 100mL",
+        "weather_obs": "Weather observations at time of sampling",
+        "cloud_cover_obs": "Cloud cover observations",
+        "rain7.in": "Rainfall in past 7 days (inches)",
+        "rain28.in": "Rainfall in past 28 days (inches)",
+        "rainmonthprior.in": "Rainfall in prior month (inches)",
+        "observations and notes": "Field observations and notes"
+    }
+    
+    # FieldData columns the site registry and query engine rely on; always loaded
+    REQUIRED_COLUMNS = ('sample_date', 'site', 'year', 'month', 'season')
+    
+    # Text each metadata collection is searched on
+    SEARCH_TEXT = {
+        'sites': lambda site: site['description'],
+        'examples': lambda ex: ex['question'],
+        'columns': lambda col: f"{col['column_name']} {col['description']}",
+    }
+    
+    def __init__(self, file_path: str, metadata_path: str = "./metadata",
+                 columns: Optional[List[str]] = None):
         """
         Initialize the data manager.
         
         Args:
             file_path: Path to Excel (.xlsx) or NetCDF (.nc) file
             metadata_path: Path for metadata storage
+            columns: Only load these FieldData columns (Excel only; None loads all).
+                REQUIRED_COLUMNS are added to any subset.
         """
         self.file_path = file_path
         self.metadata_path = metadata_path
+        self.columns = None if columns is None else list(dict.fromkeys([*self.REQUIRED_COLUMNS, *columns]))
         self.df = None
         self.last_modified = None
         self.file_type = None  # 'excel' or 'netcdf'
@@ -38,9 +115,16 @@ class DataManager:
         self.query_examples: List[Dict] = []
         self.column_metadata: List[Dict] = []
         
-        # Detect file type and load data
+        # Token indexes over the collections above, built on first search
+        self._search_indexes: Dict[str, tuple] = {}
+        
+        # Schema text / summary / site row positions for the loaded data, reset on reload
+        self._schema_cache: Optional[str] = None
+        self._summary_cache: Optional[Dict] = None
+        self._site_index: Optional[Dict[Any, np.ndarray]] = None
+        
+        # Detect file type; the data itself is loaded on first use
         self._detect_file_type()
-        self._load_data()
     
     def _detect_file_type(self):
         """Detect whether file is Excel or NetCDF."""
@@ -66,24 +150,81 @@ class DataManager:
                 self.df = self._load_netcdf()
             
             self.last_modified = current_modified
+            self._schema_cache = None
+            self._summary_cache = None
+            self._site_index = None
         
         return self.df
     
     def _load_excel(self) -> pd.DataFrame:
-        """Load data from Excel FieldData sheet."""
-        df = pd.read_excel(self.file_path, sheet_name=self.SHEET_NAME)
-        
-        # Parse dates
-        if 'sample_date' in df.columns:
-            df['sample_date'] = pd.to_datetime(df['sample_date'])
+        """Load data from Excel FieldData sheet (or its Parquet cache if fresh)."""
+        source_mtime_ns = os.stat(self.file_path).st_mtime_ns
+        df = self._read_excel_cache(source_mtime_ns)
+        if df is not None:
+            print(f"[DataManager] Loaded {len(df)} rows from Parquet cache")
+            return df
         
-        # Convert site to string to avoid mixed type issues
+        # Types are inferred, then fixed up below: reading site as text at parse
+        # time would turn 1.0 into "1" and no longer match registered site ids
+        # A callable usecols skips requested columns the sheet doesn't have
+        wanted = None if self.columns is None else set(self.columns)
+        df = pd.read_excel(
+            self.file_path, sheet_name=self.SHEET_NAME, engine=EXCEL_ENGINE,
+            usecols=None if wanted is None else (lambda col: col in wanted)
+        )
+        
+        # Parse dates (Excel date cells usually arrive already as datetime64)
+        if 'sample_date' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['sample_date']):
+            df['sample_date'] = pd.to_datetime(df['sample_date'], cache=True)
+        
+        # Convert site to string to avoid mixed type issues; categorical since
+        # there are only a handful of sites across many rows
         if 'site' in df.columns:
-            df['site'] = df['site'].astype(str)
+            df['site'] = df['site'].astype(str).astype('category')
         
         print(f"[DataManager] Loaded {len(df)} rows from Excel '{self.SHEET_NAME}' sheet")
+        
+        # Only a full read is cached; a column subset would shadow the other columns
+        if self.columns is None:
+            self._write_excel_cache(df, source_mtime_ns)
         return df
     
+    def _excel_cache_path(self) -> str:
+        """Path of the Parquet sidecar that caches the parsed FieldData sheet."""
+        return self.file_path + ".parquet"
+    
+    def _read_excel_cache(self, source_mtime_ns: int) -> Optional[pd.DataFrame]:
+        """Read the Parquet cache if it was built from this version of the Excel file."""
+        cache_path = self._excel_cache_path()
+        try:
+            # The cache's mtime is stamped with the source mtime it was built from
+            if os.stat(cache_path).st_mtime_ns != source_mtime_ns:
+                return None
+            columns = self.columns
+            if columns is not None:
+                # Like usecols above, skip requested columns the cache doesn't have
+                import pyarrow.parquet as pq
+                present = set(pq.read_schema(cache_path).names)
+                columns = [c for c in columns if c in present]
+            return pd.read_parquet(cache_path, engine="pyarrow", columns=columns)
+        except Exception:
+            # Missing/stale cache or no Parquet engine installed
+            return None
+    
+    def _write_excel_cache(self, df: pd.DataFrame, source_mtime_ns: int):
+        """Persist the parsed sheet as Parquet so later loads skip Excel parsing."""
+        cache_path = self._excel_cache_path()
+        tmp_path = cache_path + ".tmp"
+        try:
+            df.to_parquet(tmp_path, engine="pyarrow", compression="zstd")
+            os.utime(tmp_path, ns=(source_mtime_ns, source_mtime_ns))
+            # Atomic swap so a concurrent reader never sees a partial file
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            print(f"[DataManager] Skipping Parquet cache: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
     def _load_netcdf(self) -> pd.DataFrame:
         """Load data from NetCDF file."""
         try:
@@ -149,9 +290,9 @@ class DataManager:
             
             df = pd.DataFrame(rows)
             
-            # Convert site to string
+            # Convert site to (categorical) string
             if 'site' in df.columns:
-                df['site'] = df['site'].astype(str)
+                df['site'] = df['site'].astype(str).astype('category')
             
             print(f"[DataManager] Loaded {len(df)} rows from NetCDF file")
             return df
@@ -160,6 +301,16 @@ class DataManager:
         """Get current dataframe, reloading if file changed."""
         return self._load_data()
     
+    def get_site_rows(self, site_id) -> np.ndarray:
+        """Row positions (in file order) of one site's samples in get_data()."""
+        df = self._load_data()
+        
+        # Row positions per site, built once per loaded file version
+        if self._site_index is None:
+            self._site_index = df.groupby('site', sort=False, observed=True).indices
+        
+        return self._site_index.get(site_id, np.empty(0, dtype=np.intp))
+    
     def _similarity(self, query: str, text: str) -> float:
         """Calculate string similarity for simple search."""
         query_lower = query.lower()
@@ -171,16 +322,64 @@ class DataManager:
         
         # Count matching words
         matches = len(query_words & text_words)
+        return self._score_match(query_lower, text_lower, matches, len(query_words))
+    
+    @staticmethod
+    def _score_match(query_lower: str, text_lower: str, matches: int, n_query_words: int) -> float:
+        """Similarity score given the number of query words found in the text."""
         if matches > 0:
-            return 0.5 + (matches / len(query_words)) * 0.5
+            return 0.5 + (matches / n_query_words) * 0.5
         
         # Check for substring match
         if query_lower in text_lower or text_lower in query_lower:
             return 0.7
         
         # Use sequence matcher for fuzzy matching
+        if HAS_RAPIDFUZZ:
+            return fuzz.ratio(query_lower, text_lower) / 100.0
         return SequenceMatcher(None, query_lower, text_lower).ratio()
     
+    def _get_search_index(self, name: str, items: List[Dict]) -> tuple:
+        """
+        Get the token index for a metadata collection, rebuilding it if the collection changed.
+        
+        Returns:
+            Tuple of (lowercased candidate texts, {word: [candidate positions]})
+        """
+        key = (id(items), len(items))
+        cached = self._search_indexes.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        
+        text_of = self.SEARCH_TEXT[name]
+        texts = [text_of(item).lower() for item in items]
+        postings: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            for word in set(text.split()):
+                postings.setdefault(word, []).append(i)
+        
+        self._search_indexes[name] = (key, (texts, postings))
+        return texts, postings
+    
+    def _score_all(self, query: str, index: tuple, skip: Optional[List[bool]] = None) -> List[Optional[float]]:
+        """Score every candidate in an index with the same rules as _similarity (None where skipped)."""
+        texts, postings = index
+        query_lower = query.lower()
+        query_words = set(query_lower.split())
+        
+        # Count matching words per candidate from the postings lists
+        matches = [0] * len(texts)
+        for word in query_words:
+            for i in postings.get(word, ()):
+                matches[i] += 1
+        
+        if skip is None:
+            skip = [False] * len(texts)
+        return [
+            None if skipped else self._score_match(query_lower, text, m, len(query_words))
+            for text, m, skipped in zip(texts, matches, skip)
+        ]
+    
     def initialize_chroma(self, force_refresh: bool = False):
         """Initialize metadata collections (in-memory with JSON persistence)."""
         os.makedirs(self.metadata_path, exist_ok=True)
@@ -188,121 +387,164 @@ class DataManager:
         # Try to load existing metadata only if not forcing refresh
         if not force_refresh:
             self._load_metadata()
+        counts = (len(self.sites_registry), len(self.query_examples), len(self.column_metadata))
         
         # Populate with initial data if empty
         self._populate_site_registry()
         self._populate_column_metadata()
         self._populate_query_examples()
         
-        # Save to disk
-        self._save_metadata()
+        # Lowercase and tokenize the searchable text once, up front
+        self._get_search_index('sites', self.sites_registry)
+        self._get_search_index('examples', self.query_examples)
+        self._get_search_index('columns', self.column_metadata)
+        
+        # Save to disk, unless everything came from an existing metadata file
+        if (counts != (len(self.sites_registry), len(self.query_examples), len(self.column_metadata))
+                or not os.path.exists(os.path.join(self.metadata_path, "metadata.json"))):
+            self._save_metadata()
         
         print("[DataManager] Metadata initialized")
     
     def _save_metadata(self):
         """Save metadata to disk."""
+        path = os.path.join(self.metadata_path, "metadata.json")
+        column_metadata = self.column_metadata
+        if self.columns is not None:
+            # Subset loads build no column metadata; keep what a full load saved
+            column_metadata = []
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    column_metadata = _json_loads(f.read()).get("columns", [])
+        
         data = {
             "sites": self.sites_registry,
             "examples": self.query_examples,
-            "columns": self.column_metadata
+            "columns": column_metadata
         }
-        with open(os.path.join(self.metadata_path, "metadata.json"), "w") as f:
-            json.dump(data, f, indent=2, default=str)
+        with open(path, "wb") as f:
+            f.write(_json_dumps(data))
     
     def _load_metadata(self):
         """Load metadata from disk."""
         path = os.path.join(self.metadata_path, "metadata.json")
         if os.path.exists(path):
-            with open(path, "r") as f:
-                data = json.load(f)
+            with open(path, "rb") as f:
+                data = _json_loads(f.read())
                 self.sites_registry = data.get("sites", [])
                 self.query_examples = data.get("examples", [])
                 self.column_metadata = data.get("columns", [])
     
     def _populate_site_registry(self):
         """Populate site registry from Excel data."""
-        if self.df is None:
-            return
-        
         # Check if already populated
         if len(self.sites_registry) > 0:
             print(f"[DataManager] Site registry already has {len(self.sites_registry)} entries")
             return
         
-        # Get unique sites with their date ranges
-        for site_id in self.df['site'].unique():
-            site_data = self.df[self.df['site'] == site_id]
-            
-            min_date = site_data['sample_date'].min()
-            max_date = site_data['sample_date'].max()
-            sample_count = len(site_data)
+        df = self.get_data()
+        if df is None:
+            return
+        
+        # Get unique sites with their date ranges (one grouped pass over the data)
+        site_stats = self._site_stats(df)
+        
+        # All the number crunching happened in the groupby above; building the
+        # entries is a little string formatting per site, so it stays serial
+        for site_id, stats in zip(site_stats.index, site_stats.itertuples(index=False)):
+            self.sites_registry.append(self._site_entry(
+                site_id, stats.first_sample, stats.last_sample,
+                int(stats.sample_count), stats.year_min, stats.year_max
+            ))
+        
+        print(f"[DataManager] Added {len(self.sites_registry)} sites to registry")
+    
+    @staticmethod
+    def _site_stats(df: pd.DataFrame) -> pd.DataFrame:
+        """Per-site first/last sample date, sample count and year range."""
+        return df.groupby('site', sort=False, observed=True, dropna=False).agg(
+            first_sample=('sample_date', 'min'),
+            last_sample=('sample_date', 'max'),
+            sample_count=('sample_date', 'size'),
+            year_min=('year', 'min'),
+            year_max=('year', 'max'),
+        )
+    
+    @staticmethod
+    def _site_entry(site_id, first_sample, last_sample, sample_count: int, year_min, year_max) -> Dict:
+        """Build a site registry entry."""
+        # Get years active
+        if pd.notna(year_min):
+            year_range = f"{int(year_min)}-{int(year_max)}"
+        else:
+            year_range = "unknown"
+        
+        description = f"Site {site_id}, monitored {year_range}, {sample_count} samples"
+        
+        return {
+            "site_id": str(site_id),
+            "description": description,
+            "first_sample": str(first_sample),
+            "last_sample": str(last_sample),
+            "sample_count": sample_count,
+            "years_active": year_range
+        }
+    
+    def _update_site_registry(self, new_data: pd.DataFrame):
+        """Merge stats for newly added rows into the site registry (no full rescan)."""
+        new_data = new_data.assign(
+            site=new_data['site'].astype(str),
+            sample_date=pd.to_datetime(new_data['sample_date'])
+        )
+        site_stats = self._site_stats(new_data)
+        positions = {s['site_id']: i for i, s in enumerate(self.sites_registry)}
+        
+        for site_id, stats in zip(site_stats.index, site_stats.itertuples(index=False)):
+            first_sample, last_sample = stats.first_sample, stats.last_sample
+            sample_count = int(stats.sample_count)
+            year_min, year_max = stats.year_min, stats.year_max
             
-            # Get years active
-            years = sorted(site_data['year'].dropna().unique())
-            year_range = f"{int(min(years))}-{int(max(years))}" if len(years) > 0 else "unknown"
+            pos = positions.get(site_id)
+            existing = self.sites_registry[pos] if pos is not None else {}
             
-            description = f"Site {site_id}, monitored {year_range}, {sample_count} samples"
+            # Combine with the existing entry (manual registrations carry no stats)
+            if 'sample_count' in existing:
+                first_sample = pd.to_datetime(pd.Series([existing['first_sample'], first_sample])).min()
+                last_sample = pd.to_datetime(pd.Series([existing['last_sample'], last_sample])).max()
+                sample_count += existing['sample_count']
+                if existing.get('years_active', 'unknown') != 'unknown':
+                    old_min, old_max = (int(y) for y in existing['years_active'].split('-'))
+                    year_min = old_min if pd.isna(year_min) else min(old_min, year_min)
+                    year_max = old_max if pd.isna(year_max) else max(old_max, year_max)
             
-            self.sites_registry.append({
-                "site_id": str(site_id),
-                "description": description,
-                "first_sample": str(min_date),
-                "last_sample": str(max_date),
-                "sample_count": sample_count,
-                "years_active": year_range
-            })
-        
-        print(f"[DataManager] Added {len(self.sites_registry)} sites to registry")
+            entry = self._site_entry(site_id, first_sample, last_sample, sample_count, year_min, year_max)
+            if pos is None:
+                self.sites_registry.append(entry)
+            else:
+                self.sites_registry[pos] = {**existing, **entry}
+        
+        # Descriptions changed in place, which the index key can't detect
+        self._search_indexes.pop('sites', None)
     
     def _populate_column_metadata(self):
         """Populate column descriptions to help LLM understand the data."""
-        if len(self.column_metadata) > 0:
+        # A subset load can't describe the columns it skipped
+        if len(self.column_metadata) > 0 or self.columns is not None:
             return
         
-        # Column descriptions for water quality parameters
-        column_descriptions = {
-            "sample_date": "Date when the water sample was collected",
-            "site": "Site identifier/number where sample was taken",
-            "year": "Year of sample collection",
-            "month": "Month of sample collection (1-12)",
-            "season": "Season (Winter, Spring, Summer, Fall)",
-            "time": "Time of day when sample was collected",
-            "air_temp.c": "Air temperature in degrees Celsius",
-            "water_temp.c": "Water temperature in degrees Celsius",
-            "dissolved_oxygen.percent": "Dissolved oxygen as percentage saturation",
-            "dissolved_oxygen.mg_per_l": "Dissolved oxygen in milligrams per liter",
-            "uncompensated_conductivity.us_per_cm": "Uncompensated electrical conductivity in microsiemens per cm",
-            "compensated_conductivity.us_per_cm": "Temperature-compensated conductivity in microsiemens per cm",
-            "ph": "pH level (acidity/alkalinity, scale 0-14)",
-            "turbidity.ntu": "Turbidity in Nephelometric Turbidity Units (water clarity)",
-            "phycocyanin.rfu_tot": "Phycocyanin total relative fluorescence units (cyanobacteria indicator)",
-            "cdom.rfu_tot": "Colored Dissolved Organic Matter total RFU",
-            "optical_brightness.rfu_tot": "Optical brightness total RFU",
-            "chlorophyll_a.rfu_tot": "Chlorophyll-a total RFU (algae indicator)",
-            "phycocyanin.rfu_0.22": "Phycocyanin RFU filtered at 0.22 microns",
-            "cdom.rfu_0.22": "CDOM RFU filtered at 0.22 microns",
-            "ob.rfu_0.22": "Optical brightness RFU filtered at 0.22 microns",
-            "chlorophyll_a.rfu_0.22": "Chlorophyll-a RFU filtered at 0.22 microns",
-            "entero.cfu_per_100ml": "Enterococcus colony forming units per 100mL (fecal indicator bacteria)",
-            "total_coliforms.cfu_per_100ml": "Total coliform bacteria CFU per 100mL",
-            "ecoli.cfu_per_100ml": "E. coli colony forming units per 100mL (fecal contamination indicator)",
-            "fecal_coliform.mft_per_100ml": "Fecal coliform by membrane filtration per 100mL",
-            "fecal_strep.mft_per_100ml": "Fecal streptococcus by membrane filtration per 100mL",
-            "fc_to_fs.ratio": "Fecal coliform to fecal strep ratio (human vs animal source indicator)",
-            "total_coliform.mft_per_100ml": "Total coliform by membrane filtration per 100mL",
-            "weather_obs": "Weather observations at time of sampling",
-            "cloud_cover_obs": "Cloud cover observations",
-            "rain7.in": "Rainfall in past 7 days (inches)",
-            "rain28.in": "Rainfall in past 28 days (inches)",
-            "rainmonthprior.in": "Rainfall in prior month (inches)",
-            "observations and notes": "Field observations and notes"
-        }
+        df = self.get_data()
+        if df is None:
+            return
         
-        for col in self.df.columns:
+        # Non-null counts for all columns in one pass
+        counts = df.count()
+        dtypes = df.dtypes
+        
+        for col in df.columns:
             col_lower = col.lower()
-            description = column_descriptions.get(col_lower, f"Data column: {col}")
-            dtype = str(self.df[col].dtype)
-            non_null = self.df[col].notna().sum()
+            description = self.COLUMN_DESCRIPTIONS.get(col_lower, f"Data column: {col}")
+            dtype = str(dtypes[col])
+            non_null = counts[col]
             
             self.column_metadata.append({
                 "column_name": col,
@@ -389,17 +631,18 @@ class DataManager:
             return []
         
         # Score each site by similarity to query
-        scored = []
-        for site in self.sites_registry:
-            score = self._similarity(query, site['description'])
-            # Check for site number in query
-            if str(site['site_id']) in query:
-                score += 0.5
-            scored.append((score, site))
-        
-        # Sort by score and return top n
-        scored.sort(key=lambda x: x[0], reverse=True)
-        return [s[1] for s in scored[:n_results]]
+        # A site whose number appears in the query gets the top score outright,
+        # so it skips text scoring (and the fuzzy matcher) entirely
+        index = self._get_search_index('sites', self.sites_registry)
+        id_matched = [str(site['site_id']) in query for site in self.sites_registry]
+        scores = self._score_all(query, index, skip=id_matched)
+        scored = [
+            (1.5 if matched else score, site)
+            for site, matched, score in zip(self.sites_registry, id_matched, scores)
+        ]
+        
+        # Select top n by score (ties keep registry order)
+        return [s[1] for s in heapq.nlargest(n_results, scored, key=lambda x: x[0])]
     
     def get_similar_examples(self, query: str, n_results: int = 3) -> List[Dict]:
         """Get similar query examples for few-shot prompting."""
@@ -407,14 +650,11 @@ class DataManager:
             return []
         
         # Score each example by similarity
-        scored = []
-        for ex in self.query_examples:
-            score = self._similarity(query, ex['question'])
-            scored.append((score, ex))
+        index = self._get_search_index('examples', self.query_examples)
+        scored = list(zip(self._score_all(query, index), self.query_examples))
         
-        # Sort by score and return top n
-        scored.sort(key=lambda x: x[0], reverse=True)
-        return [s[1] for s in scored[:n_results]]
+        # Select top n by score (ties keep registry order)
+        return [s[1] for s in heapq.nlargest(n_results, scored, key=lambda x: x[0])]
     
     def get_relevant_columns(self, query: str, n_results: int = 10) -> List[Dict]:
         """Get column descriptions relevant to the query."""
@@ -422,15 +662,11 @@ class DataManager:
             return []
         
         # Score each column by similarity
-        scored = []
-        for col in self.column_metadata:
-            search_text = f"{col['column_name']} {col['description']}"
-            score = self._similarity(query, search_text)
-            scored.append((score, col))
+        index = self._get_search_index('columns', self.column_metadata)
+        scored = list(zip(self._score_all(query, index), self.column_metadata))
         
-        # Sort by score and return top n
-        scored.sort(key=lambda x: x[0], reverse=True)
-        return [s[1] for s in scored[:n_results]]
+        # Select top n by score (ties keep registry order)
+        return [s[1] for s in heapq.nlargest(n_results, scored, key=lambda x: x[0])]
     
     def add_monthly_data(self, new_data: pd.DataFrame, month: str):
         """
@@ -440,35 +676,38 @@ class DataManager:
             new_data: DataFrame with new rows (typically ~15 sites)
             month: Month identifier (e.g., "2025-01")
         """
-        # Load current data
-        master_df = self.get_data()
+        if self.file_type != 'excel':
+            raise ValueError("Monthly data can only be added to an Excel data file")
         
         # Verify sites exist in registry
         new_sites = set(new_data['site'].unique())
         self._verify_sites(new_sites, month)
         
-        # Append new data
-        updated_df = pd.concat([master_df, new_data], ignore_index=True)
+        # Append the new rows to FieldData in place; other sheets are left as-is
+        from openpyxl import load_workbook
         
-        # Read all sheets to preserve them
-        with pd.ExcelFile(self.excel_path) as xls:
-            all_sheets = {sheet: pd.read_excel(xls, sheet_name=sheet) for sheet in xls.sheet_names}
+        wb = load_workbook(self.file_path)
+        ws = wb[self.SHEET_NAME]
+        header = [cell.value for cell in ws[1]]
         
-        # Update FieldData
-        all_sheets[self.SHEET_NAME] = updated_df
+        # Columns not yet in the sheet get a new header cell
+        for col in new_data.columns:
+            if col not in header:
+                ws.cell(row=1, column=len(header) + 1, value=col)
+                header.append(col)
         
-        # Write all sheets back
-        with pd.ExcelWriter(self.excel_path, engine='openpyxl') as writer:
-            for sheet_name, sheet_df in all_sheets.items():
-                sheet_df.to_excel(writer, sheet_name=sheet_name, index=False)
+        for row in new_data.reindex(columns=header).itertuples(index=False):
+            ws.append([None if pd.isna(value) else value for value in row])
+        
+        wb.save(self.file_path)
+        wb.close()
         
         # Reload
         self.df = None
-        self._load_excel()
+        self._load_data()
         
-        # Update site registry if new sites found
-        self.sites_registry = []  # Reset
-        self._populate_site_registry()
+        # Update site registry with the new rows (adds any new sites)
+        self._update_site_registry(new_data)
         self._save_metadata()
         
         print(f"[DataManager] Added {len(new_data)} rows for {month}")
@@ -481,13 +720,14 @@ class DataManager:
             if str(site_id) not in known_sites:
                 print(f"⚠️  Warning: New site '{site_id}' in {month} data - will be added to registry")
     
-    def register_new_site(self, site_id: str, description: str = ""):
-        """Register a new site manually."""
+    def register_new_site(self, site_id: str, description: str = "", **attributes):
+        """Register a new site manually (extra attributes such as basin are stored as-is)."""
         doc = f"Site {site_id}, {description}" if description else f"Site {site_id}"
         
         self.sites_registry.append({
             "site_id": str(site_id),
             "description": doc,
+            **attributes,
             "added_date": datetime.now().isoformat()
         })
         
@@ -496,8 +736,10 @@ class DataManager:
     
     def get_schema_description(self) -> str:
         """Generate a schema description for the LLM."""
-        if self.df is None:
+        if self._load_data() is None:
             return "No data loaded"
+        if self._schema_cache is not None:
+            return self._schema_cache
         
         # Get date range
         date_range = ""
@@ -514,9 +756,12 @@ class DataManager:
             "Columns:"
         ]
         
+        counts = self.df.count()
+        dtypes = self.df.dtypes
+        
         for col in self.df.columns:
-            dtype = str(self.df[col].dtype)
-            non_null = self.df[col].notna().sum()
+            dtype = str(dtypes[col])
+            non_null = counts[col]
             
             # Sample values
             samples = self.df[col].dropna().head(3).tolist()
@@ -524,17 +769,22 @@ class DataManager:
             
             schema_lines.append(f"  - {col} ({dtype}): {non_null} non-null, samples: [{sample_str}]")
         
-        return "\n".join(schema_lines)
+        self._schema_cache = "\n".join(schema_lines)
+        return self._schema_cache
     
     def get_data_summary(self) -> Dict:
         """Get a summary of the data for display."""
-        if self.df is None:
+        if self._load_data() is None:
             return {}
         
-        return {
-            "total_samples": len(self.df),
-            "total_sites": self.df['site'].nunique(),
-            "date_range": f"{self.df['sample_date'].min()} to {self.df['sample_date'].max()}",
-            "years_covered": sorted(self.df['year'].dropna().unique().astype(int).tolist()),
-            "columns": len(self.df.columns)
-        }
+        if self._summary_cache is None:
+            self._summary_cache = {
+                "total_samples": len(self.df),
+                "total_sites": self.df['site'].nunique(),
+                "date_range": f"{self.df['sample_date'].min()} to {self.df['sample_date'].max()}",
+                "years_covered": sorted(self.df['year'].dropna().unique().astype(int).tolist()),
+                "columns": len(self.df.columns)
+            }
+        
+        # Copy so callers can add display fields without touching the cache
+        return dict(self._summary_cache)
@@ -8,6 +8,19 @@ import pandas as pd
 from data_manager import DataManager
 from datetime import datetime
 
+DATA_FILE = "data/water_data.xlsx"
+
+_manager = None
+
+
+def get_manager() -> DataManager:
+    """Get the DataManager for this process, creating and initializing it once."""
+    global _manager
+    if _manager is None:
+        _manager = DataManager(DATA_FILE)
+        _manager.initialize_chroma()
+    return _manager
+
 
 def add_monthly_data(data_file: str, month: str = None):
     """
@@ -23,8 +36,7 @@ def add_monthly_data(data_file: str, month: str = None):
     print(f"Adding data for {month}...")
     
     # Initialize data manager
-    dm = DataManager("data/water_data.xlsx")
-    dm.initialize_chroma()
+    dm = get_manager()
     
     # Load new data
     new_data = pd.read_excel(data_file)
@@ -46,8 +58,7 @@ def add_monthly_data(data_file: str, month: str = None):
 def register_site(site_id: str, description: str, basin: str = "", 
                   gpsx: float = 0, gpsy: float = 0, old_site: str = ""):
     """Register a new site in the system."""
-    dm = DataManager("data/water_data.xlsx")
-    dm.initialize_chroma()
+    dm = get_manager()
     
     dm.register_new_site(
         site_id=site_id,
@@ -62,26 +73,25 @@ def register_site(site_id: str, description: str, basin: str = "",
 
 def list_sites():
     """List all registered sites."""
-    dm = DataManager("data/water_data.xlsx")
-    dm.initialize_chroma()
+    dm = get_manager()
     
-    df = dm.get_data()
+    # Served from the metadata JSON; the Excel file is only read if it is missing
     print("\nRegistered Sites:")
     print("-" * 60)
-    print(df[['site', 'oldsite', 'basin', 'gpsx', 'gpsy']].to_string())
+    for site in dm.sites_registry:
+        print(f"Site {site['site_id']} - {site['description']}")
 
 
 def search_sites(query: str):
     """Search for sites by description."""
-    dm = DataManager("data/water_data.xlsx")
-    dm.initialize_chroma()
+    dm = get_manager()
     
     results = dm.search_sites(query)
     
     print(f"\nSearch results for '{query}':")
     print("-" * 60)
     for site in results:
-        print(f"Site {site['site_id']} - Basin {site['basin']} ({site['gpsx']}, {site['gpsy']})")
+        print(f"Site {site['site_id']} - {site['description']}")
 
 
 if __name__ == "__main__":
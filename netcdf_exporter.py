@@ -7,24 +7,45 @@ following CF (Climate and Forecast) conventions.
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Optional, Dict, Any
 import os
+import shutil
+import subprocess
 
 try:
     import netCDF4 as nc
     HAS_NETCDF4 = True
+    # Zstandard needs netCDF-C 4.9+ built with the HDF5 zstd filter; this only
+    # reports build support, _zstd_available() checks the filter actually loads
+    HAS_ZSTD = bool(getattr(nc, '__has_zstandard_support__', False))
 except ImportError:
     HAS_NETCDF4 = False
+    HAS_ZSTD = False
 
 
-# CF-compliant variable metadata
-VARIABLE_METADATA = {
+# Compression level per supported filter (higher levels buy little for this data)
+COMPRESSION_LEVELS = {
+    'zlib': 1,
+    'zstd': 3,
+}
+
+
+# Numeric columns that are dimensions/coordinates rather than data variables
+SKIP_COLS = {'year', 'month', 'site'}
+
+
+# CF-compliant variable metadata (read-only); 'lsd' is the number of decimal
+# digits worth keeping (used for quantization, not written as an attribute)
+VARIABLE_METADATA = MappingProxyType({
     'water_temp.C': {
         'standard_name': 'sea_water_temperature',
         'long_name': 'Water Temperature',
         'units': 'degree_Celsius',
         'valid_min': -5.0,
         'valid_max': 50.0,
+        'lsd': 2,
     },
     'air_temp.C': {
         'standard_name': 'air_temperature',
@@ -32,6 +53,7 @@ VARIABLE_METADATA = {
         'units': 'degree_Celsius',
         'valid_min': -40.0,
         'valid_max': 50.0,
+        'lsd': 2,
     },
     'dissolved_oxygen.mg_per_L': {
         'standard_name': 'mass_concentration_of_oxygen_in_sea_water',
@@ -39,12 +61,14 @@ VARIABLE_METADATA = {
         'units': 'mg/L',
         'valid_min': 0.0,
         'valid_max': 20.0,
+        'lsd': 2,
     },
     'dissolved_oxygen.percent': {
         'long_name': 'Dissolved Oxygen Saturation',
         'units': 'percent',
         'valid_min': 0.0,
         'valid_max': 200.0,
+        'lsd': 1,
     },
     'ph': {
         'standard_name': 'sea_water_ph_reported_on_total_scale',
@@ -52,12 +76,14 @@ VARIABLE_METADATA = {
         'units': '1',
         'valid_min': 0.0,
         'valid_max': 14.0,
+        'lsd': 2,
     },
     'turbidity.ntu': {
         'long_name': 'Turbidity',
         'units': 'NTU',
         'valid_min': 0.0,
         'valid_max': 5000.0,
+        'lsd': 2,
     },
     'compensated_conductivity.uS_per_cm': {
         'standard_name': 'sea_water_electrical_conductivity',
@@ -65,103 +91,148 @@ VARIABLE_METADATA = {
         'units': 'uS/cm',
         'valid_min': 0.0,
         'valid_max': 100000.0,
+        'lsd': 1,
     },
     'uncompensated_conductivity.uS_per_cm': {
         'long_name': 'Electrical Conductivity (uncompensated)',
         'units': 'uS/cm',
         'valid_min': 0.0,
         'valid_max': 100000.0,
+        'lsd': 1,
     },
     'ecoli.CFU_per_100mL': {
         'long_name': 'Escherichia coli',
         'units': 'CFU/100mL',
         'valid_min': 0.0,
         'comment': 'Colony forming units per 100 milliliters',
+        'lsd': 1,
     },
     'entero.CFU_per_100mL': {
         'long_name': 'Enterococcus',
         'units': 'CFU/100mL',
         'valid_min': 0.0,
         'comment': 'Colony forming units per 100 milliliters',
+        'lsd': 1,
     },
     'total_coliforms.CFU_per_100mL': {
         'long_name': 'Total Coliforms',
         'units': 'CFU/100mL',
         'valid_min': 0.0,
         'comment': 'Colony forming units per 100 milliliters',
+        'lsd': 1,
     },
     'fecal_coliform.MFT_per_100mL': {
         'long_name': 'Fecal Coliform',
         'units': 'MFT/100mL',
         'valid_min': 0.0,
         'comment': 'Membrane filter technique count per 100 milliliters',
+        'lsd': 1,
     },
     'fecal_strep.MFT_per_100ml': {
         'long_name': 'Fecal Streptococcus',
         'units': 'MFT/100mL',
         'valid_min': 0.0,
         'comment': 'Membrane filter technique count per 100 milliliters',
+        'lsd': 1,
     },
     'total_coliform.MFT_per_100ml': {
         'long_name': 'Total Coliform (MFT)',
         'units': 'MFT/100mL',
         'valid_min': 0.0,
+        'lsd': 1,
     },
     'fc_to_fs.ratio': {
         'long_name': 'Fecal Coliform to Fecal Strep Ratio',
         'units': '1',
         'comment': 'Ratio used to distinguish human vs animal fecal contamination',
+        'lsd': 3,
     },
     'chlorophyll_a.RFU_tot': {
         'long_name': 'Chlorophyll-a (total)',
         'units': 'RFU',
         'comment': 'Relative Fluorescence Units',
+        'lsd': 3,
     },
     'chlorophyll_a.RFU_0.22': {
         'long_name': 'Chlorophyll-a (0.22um filtered)',
         'units': 'RFU',
+        'lsd': 3,
     },
     'phycocyanin.RFU_tot': {
         'long_name': 'Phycocyanin (total)',
         'units': 'RFU',
         'comment': 'Cyanobacteria indicator',
+        'lsd': 3,
     },
     'phycocyanin.RFU_0.22': {
         'long_name': 'Phycocyanin (0.22um filtered)',
         'units': 'RFU',
+        'lsd': 3,
     },
     'CDOM.RFU_tot': {
         'long_name': 'Colored Dissolved Organic Matter (total)',
         'units': 'RFU',
+        'lsd': 3,
     },
     'CDOM.RFU_0.22': {
         'long_name': 'Colored Dissolved Organic Matter (0.22um filtered)',
         'units': 'RFU',
+        'lsd': 3,
     },
     'optical_brightness.RFU_tot': {
         'long_name': 'Optical Brightness (total)',
         'units': 'RFU',
+        'lsd': 3,
     },
     'OB.RFU_0.22': {
         'long_name': 'Optical Brightness (0.22um filtered)',
         'units': 'RFU',
+        'lsd': 3,
     },
     'rain7.in': {
         'long_name': 'Rainfall in Past 7 Days',
         'units': 'inches',
         'valid_min': 0.0,
+        'lsd': 2,
     },
     'rain28.in': {
         'long_name': 'Rainfall in Past 28 Days',
         'units': 'inches',
         'valid_min': 0.0,
+        'lsd': 2,
     },
     'rainmonthprior.in': {
         'long_name': 'Rainfall in Prior Month',
         'units': 'inches',
         'valid_min': 0.0,
+        'lsd': 2,
     },
-}
+})
+
+
+@lru_cache(maxsize=None)
+def _fallback_metadata(col: str) -> MappingProxyType:
+    """Generic metadata for a column without an entry in VARIABLE_METADATA."""
+    return MappingProxyType({
+        'long_name': col.replace('_', ' ').replace('.', ' ').title(),
+        'units': 'unknown'
+    })
+
+
+@lru_cache(maxsize=None)
+def _zstd_available() -> bool:
+    """Whether zstd variables can be written (probed once with an in-memory file)."""
+    if not HAS_ZSTD:
+        return False
+    try:
+        with nc.Dataset('zstd_probe.nc', 'w', format='NETCDF4', diskless=True, persist=False) as ds:
+            ds.createDimension('x', 1)
+            ds.createVariable('x', 'f4', ('x',), compression='zstd')[:] = 0
+    except Exception:
+        # e.g. "NetCDF: Filter error: undefined filter encountered" when the
+        # HDF5 zstd plugin is not installed
+        return False
+    return True
 
 
 class NetCDFExporter:
@@ -176,6 +247,9 @@ class NetCDFExporter:
         """
         self.data_manager = data_manager
         
+        # (DataFrame, shape, (data columns, those with metadata)) of the last lookup
+        self._data_cols_cache = None
+        
         if not HAS_NETCDF4:
             raise ImportError(
                 "netCDF4 package is required. Install with:\n"
@@ -189,7 +263,10 @@ class NetCDFExporter:
         institution: str = "Bard College",
         source: str = "Field measurements",
         comment: str = "",
-        compress: bool = True
+        compress: bool = True,
+        compression: str = "zlib",
+        quantize: bool = True,
+        cloud_optimized: bool = False
     ) -> str:
         """
         Export data to NetCDF file.
@@ -201,6 +278,12 @@ class NetCDFExporter:
             source: Data source description
             comment: Additional comments
             compress: Whether to compress variables
+            compression: Filter to compress with, 'zlib' or 'zstd' (zstd writes
+                faster but readers need zstd support; falls back to zlib if unavailable)
+            quantize: Round variables with known precision to their 'lsd' digits,
+                which makes them compress much better
+            cloud_optimized: Repack with HDF5 paged file space so remote readers
+                need fewer range requests (requires the h5repack tool)
             
         Returns:
             Path to created file
@@ -211,8 +294,24 @@ class NetCDFExporter:
         if not output_path.endswith('.nc'):
             output_path += '.nc'
         
+        if compression not in COMPRESSION_LEVELS:
+            raise ValueError(f"Unsupported compression: {compression}. Use 'zlib' or 'zstd'")
+        if not compress:
+            compression = None
+        elif compression == 'zstd' and not _zstd_available():
+            print("[NetCDFExporter] zstd not supported by this netCDF4 installation, using zlib")
+            compression = 'zlib'
+        filters = {'compression': compression, 'complevel': COMPRESSION_LEVELS.get(compression, 0)}
+        
+        # Parse sample dates once (a no-op when the column is already datetime64)
+        sample_dates = pd.to_datetime(df['sample_date'])
+        
         # Create NetCDF file
         with nc.Dataset(output_path, 'w', format='NETCDF4') as ds:
+            # Written variables are assigned in full, so skip HDF5's pre-fill pass
+            # (_FillValue is still recorded for readers)
+            ds.set_fill_off()
+            
             # Add global attributes (CF conventions)
             ds.Conventions = 'CF-1.8'
             ds.title = title
@@ -225,113 +324,200 @@ class NetCDFExporter:
             
             # Get unique sites and times
             sites = sorted(df['site'].unique())
-            times = pd.to_datetime(df['sample_date']).sort_values().unique()
+            times = sample_dates.sort_values().unique()
             
             # Create dimensions
             ds.createDimension('time', len(times))
             ds.createDimension('site', len(sites))
             ds.createDimension('name_strlen', 50)  # For site names
             
-            # Create time variable
-            time_var = ds.createVariable('time', 'f8', ('time',), zlib=compress)
+            # Create time variable (coordinates are small: contiguous, uncompressed)
+            time_var = ds.createVariable('time', 'f8', ('time',), contiguous=True)
             time_var.standard_name = 'time'
             time_var.long_name = 'Sample Date'
             time_var.units = f'days since 1970-01-01 00:00:00'
             time_var.calendar = 'gregorian'
             time_var.axis = 'T'
             
-            # Convert times to numeric
-            time_numeric = (pd.to_datetime(times) - pd.Timestamp('1970-01-01')).days
+            # Convert times to numeric (whole days since the epoch)
+            time_numeric = np.asarray(times, dtype='datetime64[D]').astype(np.int64)
             time_var[:] = time_numeric
             
             # Create site variable (as string)
-            site_var = ds.createVariable('site', 'S1', ('site', 'name_strlen'))
+            site_var = ds.createVariable('site', 'S1', ('site', 'name_strlen'), contiguous=True)
             site_var.long_name = 'Monitoring Site Identifier'
             site_var.cf_role = 'timeseries_id'
             
-            # Write site names
-            for i, site in enumerate(sites):
-                site_str = str(site).ljust(50)[:50]
-                site_var[i] = nc.stringtochar(np.array([site_str], 'S50'))
-            
-            # Create a lookup for fast indexing
-            site_to_idx = {s: i for i, s in enumerate(sites)}
-            time_to_idx = {pd.Timestamp(t): i for i, t in enumerate(times)}
+            # Write site names (one char-array conversion and write for all sites)
+            site_strs = [str(site).ljust(50)[:50] for site in sites]
+            site_var[:] = nc.stringtochar(np.array(site_strs, 'S50'))
             
             # Create data variables
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
-            skip_cols = {'year', 'month', 'site'}  # These are dimensions/coordinates
+            data_cols, _ = self._data_columns(df)
             
-            for col in numeric_cols:
-                if col in skip_cols:
-                    continue
-                
+            # All variables gridded at once as a (variable, time, site) block
+            time_idx = pd.Index(times).get_indexer(sample_dates)
+            site_idx = pd.Index(sites).get_indexer(df['site'])
+            data_block = self._grid_values(df, data_cols, time_idx, site_idx, len(times), len(sites))
+            
+            # Chunk whole time slabs across all sites, sized for at least 64 KB of
+            # float32 per chunk (smaller chunks compress poorly and cost per-chunk overhead)
+            chunk_t = min(len(times), max(1, 65536 // (max(len(sites), 1) * 4)))
+            data_chunks = (max(chunk_t, 1), max(len(sites), 1))
+            
+            # Columns with no values at all are left unwritten: HDF5 then allocates
+            # no storage and readers get the NaN fill value
+            has_data = ~np.isnan(data_block).all(axis=(1, 2))
+            
+            # Define all data variables first, then write them in one pass
+            # (netCDF-C is not thread-safe, so the writes stay sequential)
+            data_vars = []
+            for col, written in zip(data_cols, has_data):
                 # Get metadata
-                meta = VARIABLE_METADATA.get(col, {
-                    'long_name': col.replace('_', ' ').replace('.', ' ').title(),
-                    'units': 'unknown'
-                })
+                meta = dict(VARIABLE_METADATA.get(col) or _fallback_metadata(col))
+                lsd = meta.pop('lsd', None)
+                
+                # Fill mode is fixed per variable when it is defined; unwritten
+                # variables need it on so reads return the fill value
+                if written:
+                    ds.set_fill_off()
+                else:
+                    ds.set_fill_on()
                 
                 # Create variable (time, site)
                 var = ds.createVariable(
                     col.replace('.', '_').replace(' ', '_'),  # NetCDF-safe name
                     'f4',
                     ('time', 'site'),
-                    zlib=compress,
+                    **filters,
+                    chunksizes=data_chunks if compression else None,
+                    least_significant_digit=lsd if quantize else None,
                     fill_value=np.nan
                 )
                 
-                # Add attributes
-                for attr, value in meta.items():
-                    setattr(var, attr, value)
-                
-                # Fill data array
-                data_array = np.full((len(times), len(sites)), np.nan, dtype=np.float32)
-                
-                for _, row in df.iterrows():
-                    try:
-                        t_idx = time_to_idx.get(pd.Timestamp(row['sample_date']))
-                        s_idx = site_to_idx.get(row['site'])
-                        if t_idx is not None and s_idx is not None and pd.notna(row[col]):
-                            data_array[t_idx, s_idx] = row[col]
-                    except (KeyError, TypeError):
-                        continue
+                # Arrays are written as-is (NaN is the fill value; nothing is packed)
+                var.set_auto_maskandscale(False)
                 
-                var[:] = data_array
+                # Add attributes
+                var.setncatts(meta)
+                data_vars.append(var)
+            ds.set_fill_off()
+            
+            # Each variable is written whole in one call, so every chunk is complete
+            # and goes straight to disk; no chunk-cache tuning is needed
+            for var, values, written in zip(data_vars, data_block, has_data):
+                if written:
+                    var[:] = values
             
             # Add season as auxiliary coordinate
             if 'season' in df.columns:
-                season_var = ds.createVariable('season', 'S1', ('time', 'name_strlen'), zlib=compress)
+                # One string per time point, so it is sized like the data variables
+                # and compressed with them (unlike the tiny time/site coordinates)
+                season_var = ds.createVariable('season', 'S1', ('time', 'name_strlen'), **filters)
                 season_var.long_name = 'Season'
                 
-                # Get season for each time
-                time_to_season = df.groupby('sample_date')['season'].first().to_dict()
-                for i, t in enumerate(times):
-                    season = str(time_to_season.get(pd.Timestamp(t), '')).ljust(50)[:50]
-                    season_var[i] = nc.stringtochar(np.array([season], 'S50'))
+                # Get season for each time (first recorded season per date, aligned to times)
+                seasons = pd.Series(df['season'].to_numpy(), index=sample_dates).dropna()
+                seasons = seasons[seasons.index.notna() & ~seasons.index.duplicated()]
+                season_strs = (
+                    seasons.reindex(pd.DatetimeIndex(times)).fillna('').astype(str)
+                    .str.ljust(50).str[:50]
+                )
+                season_var[:] = nc.stringtochar(season_strs.to_numpy().astype('S50'))
+        
+        if cloud_optimized:
+            # Pages twice the size of a data chunk keep each chunk within one read
+            self._repack_paged(output_path, page_size=max(4096, 2 * 4 * data_chunks[0] * data_chunks[1]))
         
         print(f"[NetCDFExporter] Exported to {output_path}")
         print(f"  - {len(times)} time points")
         print(f"  - {len(sites)} sites")
-        print(f"  - {len(numeric_cols) - len(skip_cols)} variables")
+        print(f"  - {len(data_cols)} variables")
         
         return output_path
     
+    @staticmethod
+    def _repack_paged(path: str, page_size: int):
+        """Rewrite an HDF5/NetCDF4 file with the paged file-space strategy via h5repack."""
+        h5repack = shutil.which('h5repack')
+        if h5repack is None:
+            print("[NetCDFExporter] h5repack not found, skipping cloud-optimized layout")
+            return
+        
+        tmp_path = path + '.tmp'
+        try:
+            subprocess.run(
+                [h5repack, '-S', 'PAGE', '-G', str(page_size), path, tmp_path],
+                check=True, capture_output=True
+            )
+            os.replace(tmp_path, path)
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"[NetCDFExporter] Skipping cloud-optimized layout: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    @staticmethod
+    def _grid_values(df: pd.DataFrame, data_cols: tuple, time_idx: np.ndarray, site_idx: np.ndarray,
+                     n_times: int, n_sites: int) -> np.ndarray:
+        """
+        Scatter data columns onto the (time, site) grid.
+        
+        Rows outside the grid are dropped. If several rows share a (time, site)
+        cell, each variable keeps its last non-missing value.
+        
+        Returns:
+            float32 array of shape (len(data_cols), n_times, n_sites), NaN where empty
+        """
+        values = df[list(data_cols)].to_numpy(dtype=np.float32, na_value=np.nan)
+        cells = time_idx * n_sites + site_idx
+        
+        # Only rows with a missing date or site fall outside the grid
+        keep = (time_idx >= 0) & (site_idx >= 0)
+        if not keep.all():
+            cells, values = cells[keep], values[keep]
+        
+        # Collapse repeated cells first so a later NaN can't overwrite a value
+        if len(cells) != len(np.unique(cells)):
+            collapsed = pd.DataFrame(values).groupby(cells, sort=False).last()
+            cells = collapsed.index.to_numpy()
+            values = collapsed.to_numpy(dtype=np.float32, na_value=np.nan)
+        
+        block = np.full((len(data_cols), n_times * n_sites), np.nan, dtype=np.float32)
+        block[:, cells] = values.T
+        return block.reshape(len(data_cols), n_times, n_sites)
+    
+    def _data_columns(self, df: pd.DataFrame) -> tuple:
+        """
+        Numeric data columns to export, computed once per DataFrame.
+        
+        Returns:
+            Tuple of (data columns, the subset with entries in VARIABLE_METADATA)
+        """
+        cached = self._data_cols_cache
+        if cached is not None and cached[0] is df and cached[1] == df.shape:
+            return cached[2]
+        
+        numeric_cols = df.select_dtypes(include=[np.number]).columns
+        data_cols = tuple(c for c in numeric_cols if c not in SKIP_COLS)
+        with_metadata = tuple(c for c in data_cols if c in VARIABLE_METADATA)
+        
+        self._data_cols_cache = (df, df.shape, (data_cols, with_metadata))
+        return data_cols, with_metadata
+    
     def get_export_summary(self) -> Dict[str, Any]:
         """Get summary of what will be exported."""
         df = self.data_manager.get_data()
         
-        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-        skip_cols = {'year', 'month', 'site'}
-        data_vars = [c for c in numeric_cols if c not in skip_cols]
+        data_vars, with_metadata = self._data_columns(df)
+        stats = df.agg({'sample_date': ['min', 'max', 'nunique'], 'site': ['nunique']})
         
         return {
-            'time_range': f"{df['sample_date'].min()} to {df['sample_date'].max()}",
+            'time_range': f"{stats.at['min', 'sample_date']} to {stats.at['max', 'sample_date']}",
             'num_samples': len(df),
-            'num_sites': df['site'].nunique(),
-            'num_time_points': df['sample_date'].nunique(),
-            'variables': data_vars,
-            'variables_with_metadata': [v for v in data_vars if v in VARIABLE_METADATA],
+            'num_sites': int(stats.at['nunique', 'site']),
+            'num_time_points': int(stats.at['nunique', 'sample_date']),
+            'variables': list(data_vars),
+            'variables_with_metadata': list(with_metadata),
         }
 
 
@@ -5,10 +5,255 @@ and generate pandas code. Runs completely offline with no API costs.
 """
 
 import pandas as pd
+import numpy as np
 import re
-from typing import Tuple, Optional, Dict, List, Any
+from dataclasses import dataclass, field
+from functools import cached_property, lru_cache, partial
+from typing import Tuple, Optional, Dict, List, Any, Callable
 from datetime import datetime
 
+# Prefer an Aho-Corasick automaton (C) for keyword lookup; fall back to substring scans
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+# Prefer RE2 (linear-time, no backtracking) for the question regexes; fall back to re
+try:
+    import re2 as _regex
+    HAS_RE2 = True
+except ImportError:
+    _regex = re
+    HAS_RE2 = False
+
+# Numba compiles the per-year statistics kernel; without it pandas groupby does the work
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# Query patterns, compiled once at import rather than on every query.
+# The year range forms are one alternation, so a single scan finds whichever
+# comes first; each alternative fills its own pair of groups.
+_YEAR_RANGE_RE = _regex.compile(
+    r'from\s+(\d{4})\s+to\s+(\d{4})'
+    r'|between\s+(\d{4})\s+and\s+(\d{4})'
+    r'|(\d{4})\s*[-–]\s*(\d{4})'
+    r'|(\d{4})\s+to\s+(\d{4})'
+)
+_SINGLE_YEAR_RE = _regex.compile(r'\b(19\d{2}|20\d{2})\b')
+_SITE_RE = _regex.compile(r'site\s+(\d+\.?\d*)')
+_MONTH_YEAR_RE = _regex.compile(r'(\w+)\s+(\d{4})')
+
+# Query keyword flags (bits of QueryFeatures.flags)
+HAS_SITE = 1 << 0
+HAS_TREND = 1 << 1
+HAS_CORRELATION = 1 << 2
+HAS_COMPARE = 1 << 3
+HAS_COUNT = 1 << 4
+HAS_SUMMARY = 1 << 5
+HAS_LIST = 1 << 6
+HAS_BY_YEAR = 1 << 7
+HAS_BY_MONTH = 1 << 8
+HAS_BY_SEASON = 1 << 9
+HAS_BY_SITE = 1 << 10
+HAS_YEAR = 1 << 11
+HAS_MONTH = 1 << 12
+HAS_SEASON = 1 << 13
+HAS_COLUMN = 1 << 14
+
+# Flags derived from extracted values rather than substrings
+HAS_EXTREME = 1 << 15      # a min/max keyword (coldest, highest, ...)
+HAS_PARAM = 1 << 16        # the parameter is a column of the loaded data (set in query())
+HAS_SITE_ID = 1 << 17      # "site <number>"
+HAS_DATE_FILTER = 1 << 18  # a year, year range or month name
+HAS_PERIODS = 1 << 19      # two "<month> <year>" periods
+HAS_SEASON_NAME = 1 << 20  # a named season
+
+# Substrings that set each flag
+FLAG_KEYWORDS = {
+    HAS_SITE: ('site',),
+    HAS_TREND: ('trend', 'over time', 'change'),
+    HAS_CORRELATION: ('correlation', 'correlate', 'relationship'),
+    HAS_COMPARE: ('compare', ' vs ', 'versus', 'between'),
+    HAS_COUNT: ('how many', 'count', 'number of'),
+    HAS_SUMMARY: ('summary', 'describe', 'statistics', 'stats'),
+    HAS_LIST: ('list', 'show all', 'what'),
+    HAS_BY_YEAR: ('by year', 'per year', 'yearly'),
+    HAS_BY_MONTH: ('by month', 'per month', 'monthly'),
+    HAS_BY_SEASON: ('by season', 'per season', 'seasonal'),
+    HAS_BY_SITE: ('by site', 'per site'),
+    HAS_YEAR: ('year',),
+    HAS_MONTH: ('month',),
+    HAS_SEASON: ('season',),
+    HAS_COLUMN: ('column', 'parameter', 'variable'),
+}
+
+# Query intents; each indexes QueryEngine._handlers
+(CORRELATION, COMPARISON, EXTREME, AGGREGATION, SITE, TIME,
+ COUNT, TREND, SUMMARY, LIST, HELP) = range(11)
+
+# (intent, flags that must all be set, flags of which one must be set), most specific first.
+# Each rule mirrors the checks its handler makes before returning an answer.
+_INTENT_RULES = (
+    (CORRELATION, HAS_CORRELATION, 0),
+    (COMPARISON, HAS_COMPARE, HAS_PERIODS | HAS_SEASON | HAS_SEASON_NAME),
+    (EXTREME, HAS_EXTREME | HAS_PARAM, 0),
+    (AGGREGATION, HAS_PARAM, 0),
+    (SITE, HAS_SITE_ID, 0),
+    (TIME, HAS_DATE_FILTER, 0),
+    (COUNT, HAS_COUNT, 0),
+    (TREND, HAS_TREND, 0),
+    (SUMMARY, HAS_SUMMARY, 0),
+    (LIST, HAS_LIST, HAS_SITE | HAS_COLUMN | HAS_YEAR),
+)
+
+
+def classify(flags: int) -> int:
+    """Map a query's keyword flags to the single intent that should answer it."""
+    for intent, required, any_of in _INTENT_RULES:
+        if flags & required == required and (not any_of or flags & any_of):
+            return intent
+    return HELP
+
+
+def _range_mask(arr: np.ndarray, lo, hi) -> np.ndarray:
+    """Row mask of lo <= arr <= hi over a raw column array."""
+    if hi < lo:
+        return np.zeros(len(arr), dtype=bool)
+    if arr.dtype.kind in 'iu':
+        info = np.iinfo(arr.dtype)
+        if info.min <= lo and hi <= info.max:
+            # One unsigned compare: values below lo wrap around past hi - lo
+            shifted = arr - arr.dtype.type(lo)
+            return shifted.view(f'u{arr.dtype.itemsize}') <= hi - lo
+    mask = arr >= lo
+    return np.logical_and(mask, arr <= hi, out=mask)
+
+
+def _year_stats(years: np.ndarray, values: np.ndarray):
+    """
+    Per-year mean, min, max and non-null count of values in one pass.
+    
+    years must be sorted. Years whose values are all NaN are kept, with NaN
+    statistics and a count of 0, as pandas groupby does.
+    """
+    n = len(years)
+    n_groups = 0
+    for i in range(n):
+        if i == 0 or years[i] != years[i - 1]:
+            n_groups += 1
+    
+    keys = np.empty(n_groups, dtype=years.dtype)
+    mean = np.full(n_groups, np.nan)
+    vmin = np.full(n_groups, np.nan)
+    vmax = np.full(n_groups, np.nan)
+    count = np.zeros(n_groups, dtype=np.int64)
+    
+    g = -1
+    total = 0.0
+    comp = 0.0  # Kahan compensation, as pandas uses for grouped means
+    for i in range(n):
+        if i == 0 or years[i] != years[i - 1]:
+            if g >= 0 and count[g] > 0:
+                mean[g] = total / count[g]
+            g += 1
+            keys[g] = years[i]
+            total = 0.0
+            comp = 0.0
+        v = values[i]
+        if not np.isnan(v):
+            y = v - comp
+            t = total + y
+            comp = (t - total) - y
+            total = t
+            if count[g] == 0 or v < vmin[g]:
+                vmin[g] = v
+            if count[g] == 0 or v > vmax[g]:
+                vmax[g] = v
+            count[g] += 1
+    if g >= 0 and count[g] > 0:
+        mean[g] = total / count[g]
+    
+    return keys, mean, vmin, vmax, count
+
+
+if HAS_NUMBA:
+    _year_stats = numba.njit(cache=True)(_year_stats)
+
+_YEAR_STATS = ('mean', 'min', 'max', 'count')
+
+
+def _fast_year_groupby(df: pd.DataFrame, param: str, agg: Any,
+                       years: np.ndarray, order: np.ndarray) -> Optional[Any]:
+    """
+    groupby('year')[param].agg(agg) through the compiled kernel.
+    
+    order holds the positions of the rows to aggregate, in stable ascending
+    year order, and years their years; both come from the cached year index,
+    so no sort is done here.
+    
+    Returns None when the kernel does not apply (Numba missing, a non-integer
+    year or non-float param column, or an aggregation other than those of
+    _year_stats), so the caller falls back to pandas.
+    """
+    names = agg if isinstance(agg, tuple) else (agg,)
+    if not HAS_NUMBA or not set(names) <= set(_YEAR_STATS):
+        return None
+    year_dtype, value_dtype = df['year'].dtype, df[param].dtype
+    # Plain numpy dtypes only: nullable extension arrays convert to object
+    if not (isinstance(year_dtype, np.dtype) and year_dtype.kind in 'iu'
+            and isinstance(value_dtype, np.dtype) and value_dtype.kind == 'f'):
+        return None
+    
+    keys, *stats = _year_stats(years.astype(np.int64),
+                               df[param].to_numpy()[order].astype(np.float64, copy=False))
+    
+    index = pd.Index(keys.astype(years.dtype), name='year')
+    columns = dict(zip(_YEAR_STATS, stats))
+    if isinstance(agg, tuple):
+        return pd.DataFrame({name: columns[name] for name in agg}, index=index)
+    return pd.Series(columns[agg], index=index, name=param)
+
+
+@dataclass
+class QueryFeatures:
+    """Everything the handlers need from a question, extracted once per query."""
+    lower: str
+    param: Optional[str]
+    month: Optional[int]
+    year_start: Optional[int]
+    year_end: Optional[int]
+    season: Optional[str]
+    agg: str
+    flags: int
+    extreme: Optional[str] = None
+    site: Optional[Any] = None
+    params: List[str] = field(default_factory=list)
+    seasons: List[str] = field(default_factory=list)
+    periods: List[Tuple[int, int, str]] = field(default_factory=list)
+
+
+@dataclass
+class QueryResult:
+    """
+    A query's explanation plus its result table, built on first access.
+    
+    Unpacks as (explanation, DataFrame or None) like the tuples handlers used
+    to return, so callers that only show the explanation never pay for the table.
+    """
+    explanation: str
+    build_table: Callable[[], Optional[pd.DataFrame]] = field(default=lambda: None, repr=False)
+    
+    @cached_property
+    def df(self) -> Optional[pd.DataFrame]:
+        return self.build_table()
+    
+    def __iter__(self):
+        return iter((self.explanation, self.df))
+
 
 class QueryEngine:
     """Processes natural language queries using pattern matching."""
@@ -22,6 +267,29 @@ class QueryEngine:
         """
         self.data_manager = data_manager
         self._build_patterns()
+        
+        # (frame from the data manager, its compact-dtype version, memoized helpers
+        # over that version); see _ensure_dtypes, _grouper, _cached_groupby and _cached_listing
+        self._typed_cache = (None, None, None)
+        
+        # Dispatch table indexed by intent (HELP is handled separately)
+        self._handlers = (
+            self._handle_correlation_query,
+            self._handle_comparison_query,
+            self._handle_extreme_query,
+            self._handle_aggregation_query,
+            self._handle_site_query,
+            self._handle_time_query,
+            self._handle_count_query,
+            self._handle_trend_query,
+            self._handle_summary_query,
+            self._handle_list_query,
+        )
+        
+        # Compile (or load the cached build of) the year statistics kernel now
+        # rather than on the first trend or extreme query
+        if HAS_NUMBA:
+            _year_stats(np.zeros(1, dtype=np.int64), np.zeros(1))
     
     def _build_patterns(self):
         """Build regex patterns for query matching."""
@@ -77,6 +345,11 @@ class QueryEngine:
             'december': 12, 'dec': 12,
         }
         
+        # Month number -> display name (the first, full name listed for each month)
+        self._month_num_to_name = {}
+        for name, num in self.month_names.items():
+            self._month_num_to_name.setdefault(num, name.capitalize())
+        
         # Season mappings
         self.season_names = ['winter', 'spring', 'summer', 'fall', 'autumn']
         
@@ -98,8 +371,71 @@ class QueryEngine:
             'sum': 'sum',
             'count': 'count',
         }
+        
+        # Keyword tables for _scan(), each in priority order (earlier entries win);
+        # tuples so the fallback scan iterates them without dict-view overhead
+        self._keyword_tables = {
+            'parameter': tuple(self.column_aliases.items()),
+            'month': tuple(self.month_names.items()),
+            'season': tuple((s, 'Fall' if s == 'autumn' else s.capitalize()) for s in self.season_names),
+            'aggregation': tuple(self.agg_keywords.items()),
+            'extreme': tuple((k, v) for k, v in self.agg_keywords.items() if v in ('min', 'max')),
+            'flag': tuple((k, bit) for bit, keywords in FLAG_KEYWORDS.items() for k in keywords),
+        }
+        
+        # One automaton over every keyword; each word maps to its (category, rank, value) entries
+        self._automaton = None
+        if HAS_AHOCORASICK:
+            automaton = ahocorasick.Automaton()
+            for category, table in self._keyword_tables.items():
+                for rank, (keyword, value) in enumerate(table):
+                    entries = automaton.get(keyword, [])
+                    entries.append((category, rank, value))
+                    automaton.add_word(keyword, entries)
+            automaton.make_automaton()
+            self._automaton = automaton
+        
+        # Without the automaton, index keywords by first character so a scan only
+        # tries the keywords that start with a character the text contains
+        self._keywords_by_initial = {}
+        if self._automaton is None:
+            for category, table in self._keyword_tables.items():
+                for rank, (keyword, value) in enumerate(table):
+                    self._keywords_by_initial.setdefault(keyword[0], []).append((keyword, category, rank, value))
+        
+        self._scan_cache = (None, None)
     
-    def query(self, question: str) -> Tuple[str, Optional[pd.DataFrame]]:
+    def _scan(self, text_lower: str) -> Dict[str, List[Any]]:
+        """
+        Find every keyword in text_lower in a single pass.
+        
+        Returns a dict mapping category to the matched values in priority order,
+        so the first value is what the old per-alias loops would have returned.
+        The result for the most recent text is cached, as handlers re-ask for it.
+        """
+        cached_text, cached = self._scan_cache
+        if cached_text == text_lower:
+            return cached
+        
+        ranked = {}
+        if self._automaton is not None:
+            for _, entries in self._automaton.iter(text_lower):
+                for category, rank, value in entries:
+                    ranked.setdefault(category, {})[rank] = value
+        else:
+            for initial in self._keywords_by_initial.keys() & set(text_lower):
+                for keyword, category, rank, value in self._keywords_by_initial[initial]:
+                    if keyword in text_lower:
+                        ranked.setdefault(category, {})[rank] = value
+        
+        found = {}
+        for category, hits in ranked.items():
+            found[category] = [hits[rank] for rank in sorted(hits)]
+        
+        self._scan_cache = (text_lower, found)
+        return found
+    
+    def query(self, question: str) -> QueryResult:
         """
         Process a natural language query and return results.
         
@@ -107,401 +443,519 @@ class QueryEngine:
             question: Natural language question about the data
             
         Returns:
-            Tuple of (explanation text, optional result DataFrame)
+            QueryResult with the explanation text and optional result DataFrame
         """
         question_lower = question.lower().strip()
-        df = self.data_manager.get_data()
+        df = self._ensure_dtypes(self.data_manager.get_data())
         
         try:
-            # Try different query patterns (ORDER MATTERS - more specific first)
-            
-            # Pattern 1: Correlation between parameters (check early)
-            result = self._handle_correlation_query(question_lower, df)
-            if result:
-                return result
-            
-            # Pattern 2: Compare [parameter] between [seasons/sites]
-            result = self._handle_comparison_query(question_lower, df)
-            if result:
-                return result
-            
-            # Pattern 3: Coldest/warmest/highest/lowest [month] [parameter] [year range]
-            result = self._handle_extreme_query(question_lower, df)
-            if result:
-                return result
-            
-            # Pattern 4: Average/mean [parameter] by [grouping]
-            result = self._handle_aggregation_query(question_lower, df)
-            if result:
-                return result
-            
-            # Pattern 5: Show/get data for site X
-            result = self._handle_site_query(question_lower, df)
-            if result:
-                return result
-            
-            # Pattern 6: Data in year X or date range
-            result = self._handle_time_query(question_lower, df)
-            if result:
-                return result
-            
-            # Pattern 7: Count/how many queries
-            result = self._handle_count_query(question_lower, df)
-            if result:
-                return result
+            feats = self._extract_features(question_lower)
             
-            # Pattern 8: Trend/over time queries
-            result = self._handle_trend_query(question_lower, df)
-            if result:
-                return result
+            if feats.param is not None and feats.param in df.columns:
+                feats.flags |= HAS_PARAM
             
-            # Pattern 9: Summary/describe queries
-            result = self._handle_summary_query(question_lower, df)
-            if result:
-                return result
-            
-            # Pattern 10: List sites/parameters
-            result = self._handle_list_query(question_lower, df)
-            if result:
-                return result
+            # Dispatch straight to the one handler classify() picks
+            intent = classify(feats.flags)
+            if intent != HELP:
+                result = self._handlers[intent](feats, df)
+                if result:
+                    return result
             
             # Default: Show help
             return self._show_help()
             
         except Exception as e:
-            return f"Error processing query: {str(e)}", None
+            return QueryResult(f"Error processing query: {str(e)}")
     
-    def _extract_parameter(self, text: str) -> Optional[str]:
-        """Extract the parameter/column name from text."""
-        text_lower = text.lower()
+    def _ensure_dtypes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Get df with compact dtypes for the columns queries filter and group on.
         
-        for alias, column in self.column_aliases.items():
-            if alias in text_lower:
-                return column
+        season becomes categorical and integer year/month columns are downcast
+        (int16/int8), so masks and groupbys walk far fewer bytes. The conversion
+        is done once per frame the data manager hands out, i.e. once per load.
+        """
+        source, typed, _ = self._typed_cache
+        if source is df:
+            return typed
+        
+        # Shallow copy: untouched columns stay shared with the data manager's frame
+        typed = df.copy(deep=False)
+        if 'season' in typed.columns and not isinstance(typed['season'].dtype, pd.CategoricalDtype):
+            # Inferred (sorted) categories keep grouped results in the same order as before
+            typed['season'] = typed['season'].astype('category')
+        for col in ('year', 'month'):
+            if col in typed.columns and pd.api.types.is_integer_dtype(typed[col]):
+                typed[col] = pd.to_numeric(typed[col], downcast='integer')
+        
+        # Memoized results are only valid for this frame, so they go with it
+        memo = {
+            'groupby': lru_cache(maxsize=64)(partial(self._groupby, typed)),
+            'listing': lru_cache(maxsize=None)(partial(self._listing, typed)),
+            'grouper': lru_cache(maxsize=None)(partial(self._make_grouper, typed)),
+            'year_index': lru_cache(maxsize=None)(partial(self._year_index, typed)),
+        }
+        self._typed_cache = (df, typed, memo)
+        return typed
+    
+    @staticmethod
+    def _filter_mask(df: pd.DataFrame, filters: Tuple) -> np.ndarray:
+        """Row mask for (column, op, value) filters; op is '==', 'between' (value=(lo, hi)) or 'in'."""
+        masks = []
+        for col, op, value in filters:
+            if op == '==':
+                masks.append(df[col].to_numpy() == value)
+            elif op == 'between':
+                masks.append(_range_mask(df[col].to_numpy(), *value))
+            else:
+                masks.append(df[col].isin(value).to_numpy())
+        return np.logical_and.reduce(masks) if masks else np.ones(len(df), dtype=bool)
+    
+    def _groupby(self, df: pd.DataFrame, group_col: str, param: Optional[str], agg: Any,
+                 filters: Tuple = ()) -> Any:
+        """Group the filtered rows by group_col and aggregate param (group sizes if param is None)."""
+        mask = self._filter_mask(df, filters) if filters else None
+        
+        # By-year stats of the loaded frame can use its cached year order instead of a groupby
+        _, typed, memo = self._typed_cache
+        if group_col == 'year' and param is not None and HAS_NUMBA and df is typed:
+            years, order = memo['year_index']()
+            if mask is not None:
+                keep = mask[order]
+                years, order = years[keep], order[keep]
+            fast = _fast_year_groupby(df, param, agg, years, order)
+            if fast is not None:
+                return fast
+        
+        if mask is not None:
+            df = df[mask]
+        grouped = self._grouper(df, group_col)
+        if param is None:
+            return grouped.size()
+        return grouped[param].agg(list(agg) if isinstance(agg, tuple) else agg)
+    
+    @staticmethod
+    def _make_grouper(df: pd.DataFrame, group_col: Any):
+        """df grouped by group_col (a name or a tuple of names)."""
+        return df.groupby(list(group_col) if isinstance(group_col, tuple) else group_col, observed=True)
+    
+    def _grouper(self, df: pd.DataFrame, group_col: Any):
+        """
+        _make_grouper, built once per loaded frame and key.
         
-        return None
+        pandas factorizes the keys on first use and keeps the codes on the
+        groupby object, so later aggregations over the loaded frame skip that step.
+        """
+        _, typed, memo = self._typed_cache
+        if df is typed:
+            return memo['grouper'](group_col)
+        return self._make_grouper(df, group_col)
     
-    def _extract_month(self, text: str) -> Optional[int]:
-        """Extract month number from text."""
-        text_lower = text.lower()
+    def _cached_groupby(self, df: pd.DataFrame, group_col: str, param: Optional[str], agg: Any,
+                        filters: Tuple = ()) -> Any:
+        """
+        Memoized _groupby, so repeat and follow-up queries reuse earlier results.
         
-        for name, num in self.month_names.items():
-            if name in text_lower:
-                return num
+        Results are cached per loaded frame and keyed by every argument, so agg
+        (a name or a tuple of names) and filters must be hashable. Callers must
+        not modify the result in place.
+        """
+        _, typed, memo = self._typed_cache
+        if df is typed:
+            return memo['groupby'](group_col, param, agg, filters)
+        return self._groupby(df, group_col, param, agg, filters)
+    
+    @staticmethod
+    def _listing(df: pd.DataFrame, kind: str) -> List[Any]:
+        """Sorted unique 'sites' or 'years', or the 'columns', of df."""
+        if kind == 'sites':
+            return sorted(pd.unique(df['site']))
+        if kind == 'years':
+            return sorted(df['year'].dropna().unique().astype(int))
+        return list(df.columns)
+    
+    def _cached_listing(self, df: pd.DataFrame, kind: str) -> List[Any]:
+        """_listing, computed once per loaded frame (callers must not modify the list)."""
+        _, typed, memo = self._typed_cache
+        if df is typed:
+            return memo['listing'](kind)
+        return self._listing(df, kind)
+    
+    @staticmethod
+    def _year_index(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """df's years in ascending order, and the row positions in that (stable) order."""
+        years = df['year'].to_numpy()
+        order = np.argsort(years, kind='stable')
+        return years[order], order
+    
+    def _year_rows(self, df: pd.DataFrame, year_start: int, year_end: int) -> np.ndarray:
+        """
+        Ascending row positions of df with year_start <= year <= year_end.
         
-        return None
+        For the loaded frame this is two binary searches over its year index
+        plus a sort of the matching positions, instead of a scan of every row.
+        """
+        _, typed, memo = self._typed_cache
+        if df is not typed:
+            return np.flatnonzero(_range_mask(df['year'].to_numpy(), year_start, year_end))
+        years, order = memo['year_index']()
+        lo = np.searchsorted(years, year_start, side='left')
+        hi = np.searchsorted(years, year_end, side='right')
+        return np.sort(order[lo:hi])
+    
+    def _extract_features(self, question_lower: str) -> QueryFeatures:
+        """Scan a lowered question once and collect the features all handlers use."""
+        hits = self._scan(question_lower)
+        year_start, year_end = self._extract_year_range(question_lower)
+        
+        feats = QueryFeatures(
+            lower=question_lower,
+            param=self._extract_parameter(question_lower),
+            month=self._extract_month(question_lower),
+            year_start=year_start,
+            year_end=year_end,
+            season=self._extract_season(question_lower),
+            agg=self._extract_aggregation(question_lower),
+            flags=0,
+            extreme=(hits.get('extreme') or [None])[0],
+            site=self._extract_site(question_lower),
+            params=list(dict.fromkeys(hits.get('parameter', []))),
+            seasons=hits.get('season', []),
+            periods=self._extract_periods(question_lower),
+        )
+        
+        flags = 0
+        for bit in hits.get('flag', []):
+            flags |= bit
+        if feats.extreme:
+            flags |= HAS_EXTREME
+        if feats.site is not None:
+            flags |= HAS_SITE_ID
+        if feats.year_start or feats.month:
+            flags |= HAS_DATE_FILTER
+        if len(feats.periods) == 2:
+            flags |= HAS_PERIODS
+        if feats.seasons:
+            flags |= HAS_SEASON_NAME
+        feats.flags = flags
+        
+        return feats
+    
+    def _extract_parameter(self, text_lower: str) -> Optional[str]:
+        """Extract the parameter/column name from text."""
+        hits = self._scan(text_lower).get('parameter')
+        return hits[0] if hits else None
+    
+    def _extract_month(self, text_lower: str) -> Optional[int]:
+        """Extract month number from text."""
+        hits = self._scan(text_lower).get('month')
+        return hits[0] if hits else None
     
     def _extract_year_range(self, text: str) -> Tuple[Optional[int], Optional[int]]:
         """Extract year range from text."""
         # Pattern: "from 1981 to 1995" or "between 1981 and 1995" or "1981-1995"
-        
-        patterns = [
-            r'from\s+(\d{4})\s+to\s+(\d{4})',
-            r'between\s+(\d{4})\s+and\s+(\d{4})',
-            r'(\d{4})\s*[-–]\s*(\d{4})',
-            r'(\d{4})\s+to\s+(\d{4})',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                return int(match.group(1)), int(match.group(2))
+        match = _YEAR_RANGE_RE.search(text)
+        if match:
+            groups = match.groups()
+            for i in range(0, len(groups), 2):
+                if groups[i] is not None:
+                    return int(groups[i]), int(groups[i + 1])
         
         # Single year
-        match = re.search(r'\b(19\d{2}|20\d{2})\b', text)
+        match = _SINGLE_YEAR_RE.search(text)
         if match:
             year = int(match.group(1))
             return year, year
         
         return None, None
     
-    def _extract_site(self, text: str) -> Optional[Any]:
+    def _extract_site(self, text_lower: str) -> Optional[Any]:
         """Extract site identifier from text."""
         # Pattern: "site 2" or "site 2.5"
-        match = re.search(r'site\s+(\d+\.?\d*)', text.lower())
+        match = _SITE_RE.search(text_lower)
         if match:
             site_str = match.group(1)
             return float(site_str) if '.' in site_str else int(site_str)
         
         return None
     
-    def _extract_aggregation(self, text: str) -> str:
+    def _extract_periods(self, text_lower: str) -> List[Tuple[int, int, str]]:
+        """Extract "<month> <year>" periods from the first two month-year pairs in text."""
+        # Pattern: "january 2026 and november 2023"
+        matches = _MONTH_YEAR_RE.findall(text_lower)
+        if len(matches) < 2:
+            return []
+        
+        periods = []
+        for month_str, year_str in matches[:2]:
+            month_num = self.month_names.get(month_str)
+            if month_num:
+                periods.append((month_num, int(year_str), f"{month_str.capitalize()} {year_str}"))
+        return periods
+    
+    def _extract_aggregation(self, text_lower: str) -> str:
         """Extract aggregation type from text."""
-        text_lower = text.lower()
-        
-        for keyword, agg_func in self.agg_keywords.items():
-            if keyword in text_lower:
-                return agg_func
-        
-        return 'mean'  # Default
+        hits = self._scan(text_lower).get('aggregation')
+        return hits[0] if hits else 'mean'  # Default
     
-    def _extract_season(self, text: str) -> Optional[str]:
+    def _extract_season(self, text_lower: str) -> Optional[str]:
         """Extract season from text."""
-        text_lower = text.lower()
-        
-        for season in self.season_names:
-            if season in text_lower:
-                if season == 'autumn':
-                    return 'Fall'
-                return season.capitalize()
-        
-        return None
+        hits = self._scan(text_lower).get('season')
+        return hits[0] if hits else None
     
-    def _handle_extreme_query(self, question: str, df: pd.DataFrame) -> Optional[Tuple[str, pd.DataFrame]]:
+    def _handle_extreme_query(self, feats: QueryFeatures, df: pd.DataFrame) -> Optional[QueryResult]:
         """Handle queries like 'coldest january water temperature from 1981 to 1995'."""
         
         # Check for extreme keywords
-        agg_type = None
-        for keyword, agg in self.agg_keywords.items():
-            if keyword in question:
-                if agg in ['min', 'max']:
-                    agg_type = agg
-                    break
-        
+        agg_type = feats.extreme
         if not agg_type:
             return None
         
         # Extract components
-        param = self._extract_parameter(question)
+        param = feats.param
         if not param or param not in df.columns:
             return None
         
-        month = self._extract_month(question)
-        year_start, year_end = self._extract_year_range(question)
-        season = self._extract_season(question)
+        month = feats.month
+        year_start, year_end = feats.year_start, feats.year_end
+        season = feats.season
         
-        # Build query
-        filtered_df = df.copy()
+        # Build query as one combined mask over the raw column arrays
+        filters = []
         filter_desc = []
         
         if month:
-            filtered_df = filtered_df[filtered_df['month'] == month]
-            month_name = [k for k, v in self.month_names.items() if v == month][0].capitalize()
+            filters.append(('month', '==', month))
+            month_name = self._month_num_to_name[month]
             filter_desc.append(f"month = {month_name}")
         
         if season:
-            filtered_df = filtered_df[filtered_df['season'] == season]
+            filters.append(('season', '==', season))
             filter_desc.append(f"season = {season}")
         
         if year_start and year_end:
-            filtered_df = filtered_df[(filtered_df['year'] >= year_start) & (filtered_df['year'] <= year_end)]
+            filters.append(('year', 'between', (year_start, year_end)))
             filter_desc.append(f"years {year_start}-{year_end}")
         
-        if len(filtered_df) == 0:
-            return "No data found matching your criteria.", None
-        
-        # Calculate by year
-        yearly = filtered_df.groupby('year')[param].mean()
+        # Calculate by year (no groups means no rows matched)
+        yearly = self._cached_groupby(df, 'year', param, 'mean', tuple(filters))
+        if len(yearly) == 0:
+            return QueryResult("No data found matching your criteria.")
         
+        # One pass over the yearly means finds both the year and the value
+        values = yearly.to_numpy()
         if agg_type == 'min':
-            result_year = yearly.idxmin()
-            result_value = yearly.min()
+            pos = np.nanargmin(values)
             extreme_word = "lowest"
         else:
-            result_year = yearly.idxmax()
-            result_value = yearly.max()
+            pos = np.nanargmax(values)
             extreme_word = "highest"
-        
-        # Build result dataframe
-        result_df = yearly.reset_index()
-        result_df.columns = ['Year', f'Avg {param}']
-        result_df = result_df.sort_values(f'Avg {param}')
+        result_year = yearly.index[pos]
+        result_value = values[pos]
         
         filter_str = " with " + ", ".join(filter_desc) if filter_desc else ""
         explanation = f"The {extreme_word} average {param}{filter_str} was in {int(result_year)} with a value of {result_value:.2f}."
         
-        return explanation, result_df
+        # Tables are built straight from index and values, with no reset_index/rename
+        def build_table():
+            result_df = pd.DataFrame({'Year': yearly.index, f'Avg {param}': values})
+            return result_df.sort_values(f'Avg {param}')
+        
+        return QueryResult(explanation, build_table)
     
-    def _handle_aggregation_query(self, question: str, df: pd.DataFrame) -> Optional[Tuple[str, pd.DataFrame]]:
+    def _handle_aggregation_query(self, feats: QueryFeatures, df: pd.DataFrame) -> Optional[QueryResult]:
         """Handle queries like 'average dissolved oxygen by year'."""
         
-        agg_type = self._extract_aggregation(question)
-        param = self._extract_parameter(question)
+        agg_type = feats.agg
+        param = feats.param
         
         if not param or param not in df.columns:
             return None
         
         # Determine grouping
-        if 'by year' in question or 'per year' in question or 'yearly' in question:
+        if feats.flags & HAS_BY_YEAR:
             group_col = 'year'
-        elif 'by month' in question or 'per month' in question or 'monthly' in question:
+        elif feats.flags & HAS_BY_MONTH:
             group_col = 'month'
-        elif 'by season' in question or 'per season' in question or 'seasonal' in question:
+        elif feats.flags & HAS_BY_SEASON:
             group_col = 'season'
-        elif 'by site' in question or 'per site' in question:
+        elif feats.flags & HAS_BY_SITE:
             group_col = 'site'
         else:
             # Overall aggregation
             result_value = getattr(df[param].dropna(), agg_type)()
             explanation = f"The {agg_type} {param} across all data is {result_value:.2f}"
-            result_df = pd.DataFrame({param: [result_value], 'Aggregation': [agg_type]})
-            return explanation, result_df
+            return QueryResult(explanation, lambda: pd.DataFrame({param: [result_value], 'Aggregation': [agg_type]}))
         
         # Group and aggregate
-        result = df.groupby(group_col)[param].agg(agg_type).reset_index()
-        result.columns = [group_col.capitalize(), f'{agg_type.capitalize()} {param}']
+        grouped = self._cached_groupby(df, group_col, param, agg_type)
+        
+        def build_table():
+            return pd.DataFrame({
+                group_col.capitalize(): grouped.index,
+                f'{agg_type.capitalize()} {param}': grouped.to_numpy(),
+            })
         
         explanation = f"{agg_type.capitalize()} {param} grouped by {group_col}:"
         
-        return explanation, result
+        return QueryResult(explanation, build_table)
     
-    def _handle_site_query(self, question: str, df: pd.DataFrame) -> Optional[Tuple[str, pd.DataFrame]]:
+    def _handle_site_query(self, feats: QueryFeatures, df: pd.DataFrame) -> Optional[QueryResult]:
         """Handle queries like 'show data for site 2'."""
         
-        if 'site' not in question:
+        if not feats.flags & HAS_SITE:
             return None
         
-        site = self._extract_site(question)
+        site = feats.site
         if site is None:
             return None
         
-        site_df = df[df['site'] == site]
-        
-        if len(site_df) == 0:
-            return f"No data found for site {site}.", None
-        
         # Select relevant columns
         display_cols = ['sample_date', 'site', 'water_temp.C', 'dissolved_oxygen.mg_per_L', 
                        'ph', 'turbidity.ntu', 'ecoli.CFU_per_100mL']
-        display_cols = [c for c in display_cols if c in site_df.columns]
+        display_cols = [c for c in display_cols if c in df.columns]
+        
+        # Work on the site's row positions; only the last 20 rows are ever gathered
+        rows = self.data_manager.get_site_rows(site)
+        
+        if len(rows) == 0:
+            return QueryResult(f"No data found for site {site}.")
         
         # Check for year filter
-        year_start, year_end = self._extract_year_range(question)
+        year_start, year_end = feats.year_start, feats.year_end
         if year_start:
-            site_df = site_df[(site_df['year'] >= year_start) & (site_df['year'] <= year_end)]
-        
-        result_df = site_df[display_cols].tail(20)
+            rows = rows[_range_mask(df['year'].to_numpy()[rows], year_start, year_end)]
         
-        explanation = f"Data for site {site} ({len(site_df)} total samples, showing last 20):"
+        explanation = f"Data for site {site} ({len(rows)} total samples, showing last 20):"
         
-        return explanation, result_df
+        return QueryResult(explanation, lambda: df.iloc[rows[-20:]][display_cols])
     
-    def _handle_comparison_query(self, question: str, df: pd.DataFrame) -> Optional[Tuple[str, pd.DataFrame]]:
+    def _handle_comparison_query(self, feats: QueryFeatures, df: pd.DataFrame) -> Optional[QueryResult]:
         """Handle queries like 'compare summer vs winter temperature' or 'compare january 2026 and november 2023'."""
         
-        if 'compare' not in question and ' vs ' not in question and 'versus' not in question and 'between' not in question:
+        if not feats.flags & HAS_COMPARE:
             return None
         
-        param = self._extract_parameter(question)
+        param = feats.param
         if not param or param not in df.columns:
             # Try to find a parameter mentioned
-            for alias, col in self.column_aliases.items():
-                if alias in question and col in df.columns:
+            for col in feats.params:
+                if col in df.columns:
                     param = col
                     break
             if not param:
                 param = 'water_temp.C'  # Default
         
         # Check for two month-year combinations (e.g., "january 2026 and november 2023")
-        month_year_pattern = r'(\w+)\s+(\d{4})'
-        matches = re.findall(month_year_pattern, question)
-        
-        if len(matches) >= 2:
-            # Extract two time periods
-            periods = []
-            for month_str, year_str in matches[:2]:
-                month_num = self.month_names.get(month_str.lower())
-                if month_num:
-                    periods.append((month_num, int(year_str), f"{month_str.capitalize()} {year_str}"))
+        periods = feats.periods
+        if len(periods) == 2:
+            # Stats for every year-month come from one memoized groupby; pick out both periods
+            stats = self._cached_groupby(df, ('year', 'month'), param, ('mean', 'min', 'max', 'count'))
+            
+            # Periods with no samples are left out, as before
+            found = [(year, month, label) for month, year, label in periods if (year, month) in stats.index]
             
-            if len(periods) == 2:
-                results = []
-                for month, year, label in periods:
-                    period_df = df[(df['month'] == month) & (df['year'] == year)]
-                    if len(period_df) > 0:
-                        stats = {
-                            'Period': label,
-                            'Mean': period_df[param].mean(),
-                            'Min': period_df[param].min(),
-                            'Max': period_df[param].max(),
-                            'Count': period_df[param].notna().sum()
-                        }
-                        results.append(stats)
+            if found:
+                def build_table():
+                    table = stats.reindex([(year, month) for year, month, _ in found])
+                    return pd.DataFrame({
+                        'Period': [label for _, _, label in found],
+                        'Mean': table['mean'].to_numpy(),
+                        'Min': table['min'].to_numpy(),
+                        'Max': table['max'].to_numpy(),
+                        'Count': table['count'].to_numpy(),
+                    })
                 
-                if results:
-                    result_df = pd.DataFrame(results)
-                    explanation = f"Comparison of {param} between {periods[0][2]} and {periods[1][2]}:"
-                    return explanation, result_df
-                else:
-                    return f"No data found for the specified time periods.", None
+                explanation = f"Comparison of {param} between {periods[0][2]} and {periods[1][2]}:"
+                return QueryResult(explanation, build_table)
+            else:
+                return QueryResult(f"No data found for the specified time periods.")
         
         # Check for season comparison
-        seasons_found = []
-        for season in self.season_names:
-            if season in question:
-                seasons_found.append('Fall' if season == 'autumn' else season.capitalize())
+        seasons_found = feats.seasons
         
         if len(seasons_found) >= 2:
-            result = df[df['season'].isin(seasons_found)].groupby('season')[param].agg(['mean', 'min', 'max', 'count'])
-            result = result.reset_index()
+            result = self._cached_groupby(df, 'season', param, ('mean', 'min', 'max', 'count'),
+                                          (('season', 'in', tuple(seasons_found)),))
             explanation = f"Comparison of {param} between {' and '.join(seasons_found)}:"
-            return explanation, result
+            return QueryResult(explanation, result.reset_index)
         
         # Check if asking about seasons generally
-        if 'season' in question or any(s in question for s in self.season_names):
-            result = df.groupby('season')[param].agg(['mean', 'min', 'max', 'count']).reset_index()
+        if feats.flags & HAS_SEASON or seasons_found:
+            result = self._cached_groupby(df, 'season', param, ('mean', 'min', 'max', 'count'))
             explanation = f"Comparison of {param} across all seasons:"
-            return explanation, result
+            return QueryResult(explanation, result.reset_index)
         
         return None
     
-    def _handle_time_query(self, question: str, df: pd.DataFrame) -> Optional[Tuple[str, pd.DataFrame]]:
+    def _handle_time_query(self, feats: QueryFeatures, df: pd.DataFrame) -> Optional[QueryResult]:
         """Handle queries like 'data from 2020' or 'samples in january 2019'."""
         
-        year_start, year_end = self._extract_year_range(question)
-        month = self._extract_month(question)
+        year_start, year_end = feats.year_start, feats.year_end
+        month = feats.month
         
         if not year_start and not month:
             return None
         
-        filtered_df = df.copy()
+        # Positions of the matching rows, in file order: the year range comes from
+        # the sorted year index and the month is then checked on those rows only
+        rows = None
         filter_desc = []
         
         if year_start and year_end:
+            rows = self._year_rows(df, year_start, year_end)
             if year_start == year_end:
-                filtered_df = filtered_df[filtered_df['year'] == year_start]
                 filter_desc.append(f"year {year_start}")
             else:
-                filtered_df = filtered_df[(filtered_df['year'] >= year_start) & (filtered_df['year'] <= year_end)]
                 filter_desc.append(f"years {year_start}-{year_end}")
         
         if month:
-            filtered_df = filtered_df[filtered_df['month'] == month]
-            month_name = [k for k, v in self.month_names.items() if v == month][0].capitalize()
+            months = df['month'].to_numpy()
+            rows = np.flatnonzero(months == month) if rows is None else rows[months[rows] == month]
+            month_name = self._month_num_to_name[month]
             filter_desc.append(month_name)
         
-        if len(filtered_df) == 0:
-            return f"No data found for {', '.join(filter_desc)}.", None
+        n_samples = len(rows)
         
-        # Select display columns
-        display_cols = ['sample_date', 'site', 'water_temp.C', 'dissolved_oxygen.mg_per_L', 'ph', 'ecoli.CFU_per_100mL']
-        display_cols = [c for c in display_cols if c in filtered_df.columns]
+        if n_samples == 0:
+            return QueryResult(f"No data found for {', '.join(filter_desc)}.")
         
-        result_df = filtered_df[display_cols].head(30)
+        # Select display columns; only the first 30 matching rows are gathered
+        display_cols = ['sample_date', 'site', 'water_temp.C', 'dissolved_oxygen.mg_per_L', 'ph', 'ecoli.CFU_per_100mL']
+        display_cols = [c for c in display_cols if c in df.columns]
         
-        explanation = f"Data for {', '.join(filter_desc)} ({len(filtered_df)} samples, showing first 30):"
+        explanation = f"Data for {', '.join(filter_desc)} ({n_samples} samples, showing first 30):"
         
-        return explanation, result_df
+        return QueryResult(explanation, lambda: df.iloc[rows[:30]][display_cols])
     
-    def _handle_correlation_query(self, question: str, df: pd.DataFrame) -> Optional[Tuple[str, pd.DataFrame]]:
+    def _handle_correlation_query(self, feats: QueryFeatures, df: pd.DataFrame) -> Optional[QueryResult]:
         """Handle queries about correlation between parameters."""
         
-        if 'correlation' not in question and 'correlate' not in question and 'relationship' not in question:
+        if not feats.flags & HAS_CORRELATION:
             return None
         
         # Try to find two parameters
-        params_found = []
-        for alias, column in self.column_aliases.items():
-            if alias in question and column not in params_found:
-                params_found.append(column)
+        params_found = feats.params
         
         if len(params_found) < 2:
             # Default to temperature and dissolved oxygen
             params_found = ['water_temp.C', 'dissolved_oxygen.mg_per_L']
         
         # Calculate correlation
-        corr_df = df[params_found].corr()
-        corr_value = corr_df.iloc[0, 1]
+        if len(params_found) == 2:
+            # Pearson on the rows where both are present, as DataFrame.corr() does
+            pairs = df[params_found].dropna().to_numpy(dtype=np.float64)
+            if len(pairs) > 1:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    matrix = np.corrcoef(pairs[:, 0], pairs[:, 1])
+            else:
+                matrix = np.full((2, 2), np.nan)
+            corr_value = matrix[0, 1]
+            build_table = lambda: pd.DataFrame(matrix, index=params_found, columns=params_found)
+        else:
+            corr_df = df[params_found].corr()
+            corr_value = corr_df.iloc[0, 1]
+            build_table = lambda: corr_df
         
         explanation = f"Correlation between {params_found[0]} and {params_found[1]}: {corr_value:.3f}"
         if corr_value > 0.7:
@@ -515,108 +969,120 @@ class QueryEngine:
         else:
             explanation += " (strong negative correlation)"
         
-        return explanation, corr_df
+        return QueryResult(explanation, build_table)
     
-    def _handle_count_query(self, question: str, df: pd.DataFrame) -> Optional[Tuple[str, pd.DataFrame]]:
+    def _handle_count_query(self, feats: QueryFeatures, df: pd.DataFrame) -> Optional[QueryResult]:
         """Handle queries like 'how many samples per site'."""
         
-        if 'how many' not in question and 'count' not in question and 'number of' not in question:
+        if not feats.flags & HAS_COUNT:
             return None
         
-        if 'site' in question:
-            result = df.groupby('site').size().reset_index(name='sample_count')
-            result = result.sort_values('sample_count', ascending=False)
+        if feats.flags & HAS_SITE:
+            counts = self._cached_groupby(df, 'site', None, 'size')
+            build_table = lambda: counts.reset_index(name='sample_count').sort_values('sample_count', ascending=False)
             explanation = "Number of samples per site:"
-        elif 'year' in question:
-            result = df.groupby('year').size().reset_index(name='sample_count')
+        elif feats.flags & HAS_YEAR:
+            counts = self._cached_groupby(df, 'year', None, 'size')
+            build_table = lambda: counts.reset_index(name='sample_count')
             explanation = "Number of samples per year:"
-        elif 'month' in question:
-            result = df.groupby('month').size().reset_index(name='sample_count')
+        elif feats.flags & HAS_MONTH:
+            counts = self._cached_groupby(df, 'month', None, 'size')
+            build_table = lambda: counts.reset_index(name='sample_count')
             explanation = "Number of samples per month:"
         else:
             total = len(df)
-            result = pd.DataFrame({'Total Samples': [total]})
+            build_table = lambda: pd.DataFrame({'Total Samples': [total]})
             explanation = f"Total number of samples in the dataset: {total}"
         
-        return explanation, result
+        return QueryResult(explanation, build_table)
     
-    def _handle_trend_query(self, question: str, df: pd.DataFrame) -> Optional[Tuple[str, pd.DataFrame]]:
+    def _handle_trend_query(self, feats: QueryFeatures, df: pd.DataFrame) -> Optional[QueryResult]:
         """Handle queries about trends over time."""
         
-        if 'trend' not in question and 'over time' not in question and 'change' not in question:
+        if not feats.flags & HAS_TREND:
             return None
         
-        param = self._extract_parameter(question)
+        param = feats.param
         if not param or param not in df.columns:
             param = 'water_temp.C'
         
         # Calculate yearly averages
-        yearly = df.groupby('year')[param].agg(['mean', 'min', 'max', 'count']).reset_index()
-        yearly.columns = ['Year', 'Mean', 'Min', 'Max', 'Sample Count']
+        stats = self._cached_groupby(df, 'year', param, ('mean', 'min', 'max', 'count'))
         
         # Calculate overall trend
-        if len(yearly) > 1:
-            first_val = yearly['Mean'].iloc[0]
-            last_val = yearly['Mean'].iloc[-1]
+        if len(stats) > 1:
+            first_val = stats['mean'].iloc[0]
+            last_val = stats['mean'].iloc[-1]
             change = last_val - first_val
             change_pct = (change / first_val) * 100 if first_val != 0 else 0
             
             trend_desc = "increased" if change > 0 else "decreased"
-            explanation = f"Trend of {param} over time: {trend_desc} by {abs(change):.2f} ({abs(change_pct):.1f}%) from {yearly['Year'].iloc[0]:.0f} to {yearly['Year'].iloc[-1]:.0f}"
+            explanation = f"Trend of {param} over time: {trend_desc} by {abs(change):.2f} ({abs(change_pct):.1f}%) from {stats.index[0]:.0f} to {stats.index[-1]:.0f}"
         else:
             explanation = f"Yearly statistics for {param}:"
         
-        return explanation, yearly
+        def build_table():
+            return pd.DataFrame({
+                'Year': stats.index,
+                'Mean': stats['mean'].to_numpy(),
+                'Min': stats['min'].to_numpy(),
+                'Max': stats['max'].to_numpy(),
+                'Sample Count': stats['count'].to_numpy(),
+            })
+        
+        return QueryResult(explanation, build_table)
     
-    def _handle_summary_query(self, question: str, df: pd.DataFrame) -> Optional[Tuple[str, pd.DataFrame]]:
+    def _handle_summary_query(self, feats: QueryFeatures, df: pd.DataFrame) -> Optional[QueryResult]:
         """Handle queries for summary statistics."""
         
-        if 'summary' not in question and 'describe' not in question and 'statistics' not in question and 'stats' not in question:
+        if not feats.flags & HAS_SUMMARY:
             return None
         
-        param = self._extract_parameter(question)
+        param = feats.param
         
         if param and param in df.columns:
-            result = df[param].describe().reset_index()
-            result.columns = ['Statistic', param]
+            def build_table():
+                stats = df[param].describe()
+                return pd.DataFrame({'Statistic': stats.index, param: stats.to_numpy()})
             explanation = f"Summary statistics for {param}:"
         else:
             # Overall summary
             numeric_cols = ['water_temp.C', 'dissolved_oxygen.mg_per_L', 'ph', 'turbidity.ntu', 'ecoli.CFU_per_100mL']
             numeric_cols = [c for c in numeric_cols if c in df.columns]
-            result = df[numeric_cols].describe().T.reset_index()
-            result.columns = ['Parameter', 'Count', 'Mean', 'Std', 'Min', '25%', '50%', '75%', 'Max']
+            
+            def build_table():
+                # One row per parameter; describe() rows become the columns, in order
+                stats = df[numeric_cols].describe()
+                labels = ['Count', 'Mean', 'Std', 'Min', '25%', '50%', '75%', 'Max']
+                return pd.DataFrame({'Parameter': stats.columns, **dict(zip(labels, stats.to_numpy()))})
             explanation = "Summary statistics for key water quality parameters:"
         
-        return explanation, result
+        return QueryResult(explanation, build_table)
     
-    def _handle_list_query(self, question: str, df: pd.DataFrame) -> Optional[Tuple[str, pd.DataFrame]]:
+    def _handle_list_query(self, feats: QueryFeatures, df: pd.DataFrame) -> Optional[QueryResult]:
         """Handle queries to list sites, columns, etc."""
         
-        if 'list' not in question and 'show all' not in question and 'what' not in question:
+        if not feats.flags & HAS_LIST:
             return None
         
-        if 'site' in question:
-            sites = sorted(df['site'].unique())
-            result = pd.DataFrame({'Sites': sites})
+        if feats.flags & HAS_SITE:
+            sites = self._cached_listing(df, 'sites')
             explanation = f"All {len(sites)} sites in the dataset:"
-            return explanation, result
+            return QueryResult(explanation, lambda: pd.DataFrame({'Sites': sites}))
         
-        if 'column' in question or 'parameter' in question or 'variable' in question:
-            cols = list(df.columns)
-            result = pd.DataFrame({'Columns': cols})
+        if feats.flags & HAS_COLUMN:
+            cols = self._cached_listing(df, 'columns')
             explanation = f"All {len(cols)} columns in the dataset:"
-            return explanation, result
+            return QueryResult(explanation, lambda: pd.DataFrame({'Columns': cols}))
         
-        if 'year' in question:
-            years = sorted(df['year'].dropna().unique().astype(int))
-            result = pd.DataFrame({'Years': years})
+        if feats.flags & HAS_YEAR:
+            years = self._cached_listing(df, 'years')
             explanation = f"All {len(years)} years in the dataset:"
-            return explanation, result
+            return QueryResult(explanation, lambda: pd.DataFrame({'Years': years}))
         
         return None
     
-    def _show_help(self) -> Tuple[str, pd.DataFrame]:
+    def _show_help(self) -> QueryResult:
         """Show help message with example queries."""
         
         help_text = """I couldn't understand that query. Here are some examples of questions I can answer:
@@ -653,7 +1119,7 @@ class QueryEngine:
 - "List all sites"
 """
         
-        examples = pd.DataFrame({
+        examples = lambda: pd.DataFrame({
             'Example Questions': [
                 'coldest january water temperature 1981 to 1995',
                 'average dissolved oxygen by year',
@@ -664,4 +1130,4 @@ class QueryEngine:
             ]
         })
         
-        return help_text, examples
+        return QueryResult(help_text, examples)
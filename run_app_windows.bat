@@ -40,7 +40,7 @@ python -c "import streamlit" >nul 2>&1
 if errorlevel 1 (
     echo    Installing required packages (one-time^)...
     python -m pip install --upgrade pip --quiet
-    python -m pip install streamlit pandas openpyxl netCDF4 --quiet
+    python -m pip install streamlit pandas openpyxl python-calamine rapidfuzz pyahocorasick google-re2 netCDF4 --quiet
     echo    ✅ Packages installed!
 ) else (
     echo    ✅ All packages ready